@@ -0,0 +1,267 @@
+"""
+Benchmark / load-test harness for logging_mcp_server.py.
+
+Starts the server locally on a scratch log store, drives each tool at a configurable
+concurrency through two client paths, and writes latency percentiles, throughput and
+server RSS per (path, tool) to a JSON file so runs can be compared between commits:
+
+  fastmcp  one fastmcp Client session per concurrent worker (what streamlit_receiver uses)
+  raw      plain JSON-RPC POSTs over a pooled requests.Session per worker thread (the
+           transport simple_logger uses), as spec-conformant tools/call requests
+
+Example:
+    python bench_logging_server.py --concurrency 16 --requests 2000 --output bench.json
+"""
+import argparse
+import asyncio
+import concurrent.futures
+import json
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+
+import requests
+
+REPO_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Tool name -> arguments for one call. log_messages sends a 100-record batch.
+SCENARIOS = {
+    "log_message": {"message": "benchmark message", "level": "info", "source": "bench"},
+    "log_messages": {"records": [{"message": f"benchmark message {i}", "level": "info", "source": "bench"}
+                                 for i in range(100)]},
+    "get_logs_table": {"limit": 100},
+    "generate_pie_chart": {"labels": ["A", "B", "C"], "values": [10.0, 20.0, 30.0], "title": "Bench"},
+    "generate_sunburst_chart": {"data_type": "tech_stack"},
+    "generate_mermaid_diagram": {"diagram_type": "sequence"},
+}
+
+
+def start_server(port: int, store_dir: str) -> subprocess.Popen:
+    env = dict(os.environ, LOG_STORE_DIR=store_dir, PYTHONPATH=REPO_DIR)
+    # Measure the server, not its per-client rate limits (all raw-path workers share one address)
+    for lane in ("INGEST", "QUERY", "CHART"):
+        env.setdefault(f"{lane}_RATE", "1e9")
+        env.setdefault(f"{lane}_BURST", "1e9")
+    code = f"import logging_mcp_server as s; s.mcp.run(transport='http', host='127.0.0.1', port={port})"
+    proc = subprocess.Popen([sys.executable, "-c", code], cwd=store_dir, env=env,
+                            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        if proc.poll() is not None:
+            raise RuntimeError(f"Server exited with code {proc.returncode}")
+        try:
+            with socket.create_connection(("127.0.0.1", port), timeout=0.5):
+                return proc
+        except OSError:
+            time.sleep(0.2)
+    proc.kill()
+    raise RuntimeError("Server did not start within 30s")
+
+
+def server_rss_bytes(pid: int) -> int | None:
+    try:
+        import psutil
+        return psutil.Process(pid).memory_info().rss
+    except ImportError:
+        pass
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        return None
+    return None
+
+
+def summarize(latencies: list[float], errors: int, elapsed: float) -> dict:
+    ordered = sorted(latencies)
+
+    def pct(p):
+        if not ordered:
+            return None
+        return round(ordered[min(len(ordered) - 1, int(len(ordered) * p))] * 1000, 3)
+
+    return {
+        "requests": len(latencies) + errors,
+        "errors": errors,
+        "elapsed_seconds": round(elapsed, 3),
+        "throughput_rps": round(len(latencies) / elapsed, 1) if elapsed else None,
+        "latency_ms": {"p50": pct(0.50), "p95": pct(0.95), "p99": pct(0.99),
+                       "max": round(ordered[-1] * 1000, 3) if ordered else None},
+    }
+
+
+def tool_failed(structured) -> bool:
+    """
+    Whether a tool's structured result reports failure. Tools (and scheduler rejections)
+    answer {"status": "error", ...} as a regular result, which must not count as a fast success.
+    """
+    return isinstance(structured, dict) and structured.get("status") == "error"
+
+
+# --- fastmcp client path ---
+
+async def run_fastmcp(url: str, tool: str, arguments: dict, total: int, concurrency: int) -> dict:
+    from fastmcp.client import Client
+
+    latencies: list[float] = []
+    errors = 0
+    remaining = total
+
+    async def worker():
+        nonlocal remaining, errors
+        async with Client(url) as client:
+            while remaining > 0:
+                remaining -= 1
+                started = time.perf_counter()
+                try:
+                    result = await client.call_tool(tool, arguments)
+                    if tool_failed(result.structured_content):
+                        raise RuntimeError(result.structured_content)
+                    latencies.append(time.perf_counter() - started)
+                except Exception:
+                    errors += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return summarize(latencies, errors, time.perf_counter() - started)
+
+
+# --- raw JSON-RPC path ---
+
+class RawSession:
+    """
+    Minimal streamable-HTTP MCP client over requests: initialize once, then tools/call.
+    """
+    HEADERS = {"Accept": "application/json, text/event-stream", "Content-Type": "application/json"}
+
+    def __init__(self, url: str):
+        self.url = url
+        self.http = requests.Session()
+        self.headers = dict(self.HEADERS)
+        self._id = 0
+        response = self._post("initialize", {
+            "protocolVersion": "2025-06-18", "capabilities": {},
+            "clientInfo": {"name": "bench_logging_server", "version": "1"},
+        })
+        if "mcp-session-id" in response.headers:
+            self.headers["mcp-session-id"] = response.headers["mcp-session-id"]
+        self.http.post(self.url, json={"jsonrpc": "2.0", "method": "notifications/initialized"},
+                       headers=self.headers, timeout=10)
+
+    def _post(self, method: str, params: dict) -> requests.Response:
+        self._id += 1
+        response = self.http.post(self.url, json={"jsonrpc": "2.0", "id": self._id, "method": method, "params": params},
+                                  headers=self.headers, timeout=30)
+        response.raise_for_status()
+        return response
+
+    def call_tool(self, tool: str, arguments: dict) -> dict:
+        response = self._post("tools/call", {"name": tool, "arguments": arguments})
+        body = response.text
+        if response.headers.get("content-type", "").startswith("text/event-stream"):
+            body = next(line[len("data: "):] for line in body.splitlines() if line.startswith("data: "))
+        result = json.loads(body)
+        if "error" in result or result.get("result", {}).get("isError") or tool_failed(
+                result["result"].get("structuredContent")):
+            raise RuntimeError(result)
+        return result
+
+
+def run_raw(url: str, tool: str, arguments: dict, total: int, concurrency: int) -> dict:
+    latencies: list[float] = []
+    errors = 0
+    remaining = total
+    lock = threading.Lock()
+
+    def worker():
+        nonlocal remaining, errors
+        session = RawSession(url)
+        while True:
+            with lock:
+                if remaining <= 0:
+                    return
+                remaining -= 1
+            started = time.perf_counter()
+            try:
+                session.call_tool(tool, arguments)
+                elapsed = time.perf_counter() - started
+                with lock:
+                    latencies.append(elapsed)
+            except Exception:
+                with lock:
+                    errors += 1
+
+    started = time.perf_counter()
+    with concurrent.futures.ThreadPoolExecutor(max_workers=concurrency) as pool:
+        for future in [pool.submit(worker) for _ in range(concurrency)]:
+            future.result()
+    return summarize(latencies, errors, time.perf_counter() - started)
+
+
+def git_commit() -> str | None:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "HEAD"], cwd=REPO_DIR).decode().strip()
+    except Exception:
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--concurrency", type=int, default=8, help="Concurrent clients per run")
+    parser.add_argument("--requests", type=int, default=500, help="Calls per (path, tool) run")
+    parser.add_argument("--tools", nargs="+", default=list(SCENARIOS), choices=list(SCENARIOS))
+    parser.add_argument("--paths", nargs="+", default=["fastmcp", "raw"], choices=["fastmcp", "raw"])
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--url", help="Benchmark an already running server instead of starting one")
+    parser.add_argument("--output", default="bench_results.json", help="Where to write the JSON report")
+    args = parser.parse_args()
+
+    store_dir = tempfile.mkdtemp(prefix="bench-log-store-")
+    proc = None
+    url = args.url
+    if url is None:
+        proc = start_server(args.port, store_dir)
+        url = f"http://127.0.0.1:{args.port}/mcp"
+
+    report = {
+        "commit": git_commit(),
+        "started_at": datetime.now().isoformat(timespec="seconds"),
+        "concurrency": args.concurrency,
+        "requests_per_run": args.requests,
+        "url": url,
+        "results": {},
+    }
+    try:
+        for path in args.paths:
+            for tool in args.tools:
+                arguments = SCENARIOS[tool]
+                if path == "fastmcp":
+                    result = asyncio.run(run_fastmcp(url, tool, arguments, args.requests, args.concurrency))
+                else:
+                    result = run_raw(url, tool, arguments, args.requests, args.concurrency)
+                if proc is not None:
+                    result["server_rss_bytes"] = server_rss_bytes(proc.pid)
+                report["results"].setdefault(path, {})[tool] = result
+                latency = result["latency_ms"]
+                print(f"{path:8} {tool:26} {result['throughput_rps']:>9} req/s  "
+                      f"p50 {latency['p50']}ms  p95 {latency['p95']}ms  p99 {latency['p99']}ms  "
+                      f"errors {result['errors']}")
+    finally:
+        if proc is not None:
+            proc.terminate()
+            proc.wait(timeout=10)
+
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"Wrote {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,192 @@
+"""
+Chart builders for the logging MCP server. Everything here is a pure function of its
+arguments that returns a picklable result dict, so the server can run it in a worker
+process (see CHART_WORKERS in logging_mcp_server.py).
+"""
+import importlib
+import os
+import threading
+import time
+
+# Default cap on the wedges a sunburst draws; larger trees are pruned to fit
+SUNBURST_MAX_NODES = 2000
+# Numeric lists at least this long are shipped as base64 typed arrays by the "typed" transport
+TYPED_ARRAY_MIN_LENGTH = 16
+
+def warm():
+    """
+    Imports the plotting stack so the first chart does not pay for it.
+    """
+    for module in ("numpy", "plotly.graph_objects", "plotly.io", "sunburst_data"):
+        importlib.import_module(module)
+
+def init_worker(server_pid: int):
+    """
+    Chart worker process initializer: warms the plotting stack and exits the worker if
+    the server goes away without shutting the pool down (e.g. killed by a signal).
+    """
+    warm()
+    threading.Thread(target=_exit_with_parent, args=(server_pid,), name="parent-watch", daemon=True).start()
+
+def _exit_with_parent(server_pid: int):
+    while os.getppid() == server_pid:
+        time.sleep(1.0)
+    os._exit(0)
+
+def figure_payload(fig, transport: str = "json") -> dict:
+    """
+    Serializes a figure for a tool response.
+
+    "json" returns the figure as a JSON string under "chart_json" (parse with pio.from_json).
+    "typed" returns the figure spec as a nested object under "chart_spec", with numeric
+    arrays encoded as plotly.js base64 typed arrays ({"dtype", "bdata"}), so clients can
+    hand it straight to st.plotly_chart without decoding a second JSON layer.
+    """
+    if transport != "typed":
+        return {"chart_json": fig.to_json()}
+
+    import json
+    import plotly.io as pio
+
+    # plotly already encodes numpy arrays as typed arrays; also pack long plain numeric lists
+    spec = json.loads(pio.to_json(fig, validate=False))
+    return {"chart_spec": _pack_numeric_lists(spec), "transport": "typed"}
+
+def _pack_numeric_lists(obj):
+    if isinstance(obj, dict):
+        return {k: _pack_numeric_lists(v) for k, v in obj.items()}
+    if isinstance(obj, list):
+        if len(obj) >= TYPED_ARRAY_MIN_LENGTH and all(
+            isinstance(v, (int, float)) and not isinstance(v, bool) for v in obj
+        ):
+            import numpy as np
+            from _plotly_utils.utils import to_typed_array_spec
+
+            return to_typed_array_spec(np.asarray(obj))
+        return [_pack_numeric_lists(v) for v in obj]
+    return obj
+
+def pie_chart(labels: list[str], values: list[float], title: str = "Pie Chart", transport: str = "json") -> dict:
+    """
+    Builds a Plotly pie chart, serialized per figure_payload.
+    """
+    import plotly.graph_objects as go
+
+    fig = go.Figure(data=[go.Pie(labels=labels, values=values)])
+    fig.update_layout(title_text=title)
+    return {"status": "success", **figure_payload(fig, transport)}
+
+def sunburst_chart(data_type: str = "company_structure", transport: str = "json",
+                   ids: list[str] | None = None, parents: list[str | None] | None = None,
+                   values: list[float] | None = None, labels: list[str] | None = None,
+                   branchvalues: str = "remainder", table: dict[str, list] | None = None,
+                   path: list[str] | None = None, value_column: str | None = None,
+                   title: str | None = None, max_depth: int | None = None,
+                   min_fraction: float = 0.0, max_nodes: int | None = SUNBURST_MAX_NODES) -> dict:
+    """
+    Builds a sunburst from a built-in dataset or user-supplied hierarchy; see the
+    generate_sunburst_chart tool for the arguments.
+    """
+    from sunburst_data import SunburstTree
+
+    if ids is not None or table is not None:
+        try:
+            if ids is not None:
+                tree = SunburstTree.from_arrays(ids, parents or [], values or [], labels, branchvalues)
+            else:
+                tree = SunburstTree.from_table(table, path or [], value_column)
+            rendered = tree.prune(max_depth, min_fraction, max_nodes)
+        except ValueError as e:
+            return {"status": "error", "message": f"Invalid hierarchy: {e}"}
+        fig = _sunburst_figure(rendered, title or "Sunburst Chart")
+        return {"status": "success", **figure_payload(fig, transport), "nodes": len(tree), "rendered_nodes": len(rendered)}
+
+    # Define different interesting datasets
+    datasets = {
+        "company_structure": {
+            "names": ["TechCorp", "Engineering", "Sales", "Marketing", "HR", 
+                     "Frontend", "Backend", "DevOps", "Direct Sales", "Online Sales", 
+                     "Channel Partners", "Content Marketing", "Digital Marketing", 
+                     "SEO/SEM", "Recruitment", "Training", "Benefits"],
+            "parents": ["", "TechCorp", "TechCorp", "TechCorp", "TechCorp",
+                       "Engineering", "Engineering", "Engineering", "Sales", "Sales",
+                       "Sales", "Marketing", "Marketing", "Marketing", "HR", "HR", "HR"],
+            "values": [500, 200, 150, 100, 50,
+                      80, 70, 50, 60, 50, 40, 40, 35, 25, 20, 20, 10],
+            "title": "Company Organizational Structure"
+        },
+        
+        "tech_stack": {
+            "names": ["Tech Stack", "Frontend", "Backend", "Database", "DevOps",
+                     "React", "Vue", "Angular", "Python", "Node.js", "Java",
+                     "PostgreSQL", "MongoDB", "Redis", "Docker", "Kubernetes", "AWS"],
+            "parents": ["", "Tech Stack", "Tech Stack", "Tech Stack", "Tech Stack",
+                       "Frontend", "Frontend", "Frontend", "Backend", "Backend", "Backend",
+                       "Database", "Database", "Database", "DevOps", "DevOps", "DevOps"],
+            "values": [1000, 300, 400, 200, 100,
+                      120, 100, 80, 180, 120, 100,
+                      80, 70, 50, 40, 35, 25],
+            "title": "Technology Stack Distribution"
+        },
+        
+        "sales_regions": {
+            "names": ["Global Sales", "North America", "Europe", "Asia Pacific",
+                     "USA", "Canada", "Mexico", "UK", "Germany", "France",
+                     "Japan", "China", "Australia", "India"],
+            "parents": ["", "Global Sales", "Global Sales", "Global Sales",
+                       "North America", "North America", "North America", 
+                       "Europe", "Europe", "Europe",
+                       "Asia Pacific", "Asia Pacific", "Asia Pacific", "Asia Pacific"],
+            "values": [10000, 4500, 3000, 2500,
+                      3000, 1000, 500, 1200, 800, 1000,
+                      800, 700, 500, 500],
+            "title": "Sales Performance by Region (in thousands)"
+        },
+        
+        "project_breakdown": {
+            "names": ["Software Project", "Development", "Testing", "Documentation", "Management",
+                     "Core Features", "UI/UX", "API", "Unit Tests", "Integration Tests", "E2E Tests",
+                     "User Manual", "API Docs", "Code Comments", "Planning", "Monitoring", "Reviews"],
+            "parents": ["", "Software Project", "Software Project", "Software Project", "Software Project",
+                       "Development", "Development", "Development", "Testing", "Testing", "Testing",
+                       "Documentation", "Documentation", "Documentation", "Management", "Management", "Management"],
+            "values": [800, 400, 200, 120, 80,
+                      200, 120, 80, 80, 70, 50,
+                      50, 40, 30, 30, 30, 20],
+            "title": "Software Project Time Allocation (hours)"
+        }
+    }
+    
+    # Get the selected dataset or default to company_structure
+    selected_data = datasets.get(data_type, datasets["company_structure"])
+    
+    tree = SunburstTree.from_arrays(selected_data["names"], selected_data["parents"], selected_data["values"],
+                                    branchvalues="total")
+    fig = _sunburst_figure(tree.prune(max_depth, min_fraction, max_nodes), selected_data["title"])
+    
+    return {"status": "success", **figure_payload(fig, transport), "data_type": data_type}
+
+def _sunburst_figure(tree, title: str):
+    """
+    Draws a pruned SunburstTree, colored by subtree value.
+    """
+    import plotly.graph_objects as go
+
+    fig = go.Figure(go.Sunburst(
+        ids=tree.ids.tolist(),
+        labels=tree.labels.tolist(),
+        parents=tree.parent_ids(),
+        values=tree.totals,
+        branchvalues="total",
+        marker=dict(colors=tree.totals, colorscale="Viridis", showscale=True, colorbar=dict(title="values")),
+        hovertemplate="%{label}<br>values=%{value:,}<extra></extra>",
+    ))
+    
+    # Customize the layout
+    fig.update_layout(
+        title_text=title,
+        font_size=12,
+        title_font_size=16,
+        margin=dict(t=50, l=25, r=25, b=25)
+    )
+    return fig
@@ -0,0 +1,170 @@
+import logging
+import os
+import re
+import sqlite3
+import threading
+
+from log_store import LogStore
+
+# Records the indexer reads from the store per transaction
+DEFAULT_INDEX_BATCH = 5000
+# How often the indexer checks the store for new records when nothing woke it
+DEFAULT_INDEX_INTERVAL = 0.5
+INDEX_FILENAME = "search.sqlite3"
+
+SEARCH_ORDERS = ("rank", "newest")
+_TERM = re.compile(r"\w+\*?", re.UNICODE)
+
+
+class SearchSyntaxError(ValueError):
+    """Raised when a search query cannot be parsed."""
+
+
+class LogSearchIndex:
+    """
+    Full-text index over a LogStore's message, source and level, kept in an SQLite
+    FTS5 table whose rowid is the record's seq. A background thread follows the store
+    (read_from), indexing new records in batches and deleting those retention dropped;
+    the position it has indexed through is persisted, so restarts resume where they
+    stopped. Queries use FTS5 syntax: "exact phrase", prefix*, AND/OR/NOT, and
+    column filters such as level:error.
+    """
+
+    def __init__(self, store: LogStore, path: str | None = None, batch: int = DEFAULT_INDEX_BATCH,
+                 interval: float = DEFAULT_INDEX_INTERVAL):
+        self.store = store
+        self.path = path or os.path.join(store.directory, INDEX_FILENAME)
+        self.batch = batch
+        self.interval = interval
+        self._local = threading.local()
+        self._index_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._closed = threading.Event()
+
+        db = self._connection()
+        db.executescript("""
+            CREATE VIRTUAL TABLE IF NOT EXISTS logs USING fts5(
+                message, source, level, timestamp UNINDEXED, prefix='2 3'
+            );
+            CREATE TABLE IF NOT EXISTS state (key TEXT PRIMARY KEY, value INTEGER NOT NULL);
+        """)
+        self.indexed_seq = self._state("indexed_seq")
+        if self.indexed_seq > len(store):
+            # The store was reset underneath the index; start over
+            with db:
+                db.execute("DELETE FROM logs")
+            self.indexed_seq = 0
+        self._pruned_seq = self._state("pruned_seq")
+
+        self._thread = threading.Thread(target=self._run, name="log-search-indexer", daemon=True)
+        self._thread.start()
+
+    def _connection(self) -> sqlite3.Connection:
+        """
+        One connection per thread; WAL lets queries run while the indexer writes.
+        """
+        db = getattr(self._local, "db", None)
+        if db is None:
+            db = self._local.db = sqlite3.connect(self.path)
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("PRAGMA synchronous=NORMAL")
+        return db
+
+    def _state(self, key: str) -> int:
+        row = self._connection().execute("SELECT value FROM state WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else 0
+
+    # --- Indexing ---
+
+    def _run(self):
+        while not self._closed.is_set():
+            try:
+                while self.catch_up():
+                    pass
+            except Exception:
+                logging.exception("Log search indexing failed")
+            self._wake.wait(self.interval)
+            self._wake.clear()
+
+    def catch_up(self) -> int:
+        """
+        Indexes up to one batch of records appended since the last call and removes
+        records dropped by retention. Returns how many records were indexed.
+        """
+        with self._index_lock:
+            return self._catch_up_locked()
+
+    def _catch_up_locked(self) -> int:
+        db = self._connection()
+        first_seq = self.store.seq_range()[0]
+        if first_seq > self._pruned_seq:
+            with db:
+                db.execute("DELETE FROM logs WHERE rowid < ?", (first_seq,))
+                db.execute("INSERT OR REPLACE INTO state VALUES ('pruned_seq', ?)", (first_seq,))
+            self._pruned_seq = first_seq
+
+        records, cursor = self.store.read_from(self.indexed_seq, self.batch)
+        if cursor == self.indexed_seq:
+            return 0
+        with db:
+            db.executemany(
+                "INSERT INTO logs (rowid, message, source, level, timestamp) VALUES (?, ?, ?, ?, ?)",
+                [(r["seq"], r["message"], r["source"], r["level"], r["timestamp"]) for r in records],
+            )
+            db.execute("INSERT OR REPLACE INTO state VALUES ('indexed_seq', ?)", (cursor,))
+        self.indexed_seq = cursor
+        return len(records)
+
+    def notify(self):
+        """
+        Wakes the indexer now rather than at its next poll.
+        """
+        self._wake.set()
+
+    def close(self):
+        self._closed.set()
+        self._wake.set()
+        self._thread.join()
+
+    # --- Queries ---
+
+    def search(self, query: str, limit: int = 50, since: float | None = None, until: float | None = None,
+               order: str = "rank") -> list[dict]:
+        """
+        Returns up to limit matching records as {seq, timestamp, level, source, message,
+        score}, best match first (order="rank", BM25; lower score is better) or newest
+        first (order="newest"). since/until are epoch seconds (until exclusive) on
+        ingestion time. Queries that are not valid FTS5 syntax are retried as plain
+        terms (each word or word* must appear); SearchSyntaxError if that fails too.
+        """
+        if order not in SEARCH_ORDERS:
+            raise ValueError(f"Unknown order {order!r}, expected one of {SEARCH_ORDERS}")
+        lo, hi = self.store.seq_range(since, until)
+        if hi <= lo:
+            return []
+        sql = (
+            "SELECT rowid, timestamp, level, source, message, bm25(logs) AS score FROM logs "
+            "WHERE logs MATCH ? AND rowid >= ? AND rowid < ? "
+            + ("ORDER BY score" if order == "rank" else "ORDER BY rowid DESC")
+            + " LIMIT ?"
+        )
+        db = self._connection()
+        try:
+            rows = db.execute(sql, (query, lo, hi, limit)).fetchall()
+        except sqlite3.OperationalError:
+            terms = _TERM.findall(query)
+            if not terms:
+                raise SearchSyntaxError(f"Cannot parse search query {query!r}") from None
+            plain = " ".join(f'"{t[:-1]}"*' if t.endswith("*") else f'"{t}"' for t in terms)
+            rows = db.execute(sql, (plain, lo, hi, limit)).fetchall()
+        return [
+            {"seq": seq, "timestamp": timestamp, "level": level, "source": source, "message": message,
+             "score": round(score, 4)}
+            for seq, timestamp, level, source, message, score in rows
+        ]
+
+    def lag(self) -> int:
+        """
+        Records appended to the store but not indexed yet.
+        """
+        return len(self.store) - self.indexed_seq
@@ -0,0 +1,100 @@
+import logging
+import logging.handlers
+import queue
+import threading
+
+OVERFLOW_POLICIES = ("block", "drop-oldest", "sample")
+
+
+class BoundedQueueHandler(logging.handlers.QueueHandler):
+    """
+    QueueHandler over a bounded queue with a configurable overflow policy:
+
+      block        wait for the listener to make room (never loses records)
+      drop-oldest  evict the oldest queued record to make room for the new one
+      sample       while the queue is full keep only every sample_every-th new record
+                   (evicting the oldest for it) and drop the rest
+
+    Records lost to overflow are counted in dropped.
+    """
+
+    def __init__(self, maxsize: int = 10000, overflow: str = "drop-oldest", sample_every: int = 10):
+        if overflow not in OVERFLOW_POLICIES:
+            raise ValueError(f"Unknown overflow policy {overflow!r}, expected one of {OVERFLOW_POLICIES}")
+        super().__init__(queue.Queue(maxsize))
+        self.overflow = overflow
+        self.sample_every = sample_every
+        self.enqueued = 0
+        self.dropped = 0
+        self._overflowed = 0
+        self._counter_lock = threading.Lock()
+
+    def enqueue(self, record: logging.LogRecord):
+        if self.overflow == "block":
+            self.queue.put(record)
+            self._count_enqueued()
+            return
+        try:
+            self.queue.put_nowait(record)
+            self._count_enqueued()
+            return
+        except queue.Full:
+            pass
+
+        with self._counter_lock:
+            self._overflowed += 1
+            if self.overflow == "sample" and self._overflowed % self.sample_every:
+                self.dropped += 1
+                return
+            # Evict the oldest record to make room for this one
+            while True:
+                try:
+                    self.queue.get_nowait()
+                    self.dropped += 1
+                except queue.Empty:
+                    pass
+                try:
+                    self.queue.put_nowait(record)
+                    self.enqueued += 1
+                    return
+                except queue.Full:
+                    continue
+
+    def _count_enqueued(self):
+        with self._counter_lock:
+            self.enqueued += 1
+
+    def stats(self) -> dict:
+        return {
+            "overflow_policy": self.overflow,
+            "queue_size": self.queue.qsize(),
+            "queue_capacity": self.queue.maxsize,
+            "enqueued": self.enqueued,
+            "dropped": self.dropped,
+        }
+
+
+class AsyncLogSink:
+    """
+    Routes the root logger through a BoundedQueueHandler; a QueueListener thread
+    writes to the real handlers, so logging calls never wait on stderr or disk.
+    """
+
+    def __init__(self, handlers: list[logging.Handler], level: int = logging.INFO, maxsize: int = 10000,
+                 overflow: str = "drop-oldest", sample_every: int = 10):
+        self.handler = BoundedQueueHandler(maxsize, overflow, sample_every)
+        self.listener = logging.handlers.QueueListener(self.handler.queue, *handlers, respect_handler_level=True)
+        root = logging.getLogger()
+        root.setLevel(level)
+        root.addHandler(self.handler)
+        self.listener.start()
+
+    def stats(self) -> dict:
+        return self.handler.stats()
+
+    def stop(self):
+        """
+        Flushes queued records to the real handlers and stops the listener thread.
+        """
+        logging.getLogger().removeHandler(self.handler)
+        self.listener.stop()
@@ -0,0 +1,759 @@
+import bisect
+import gzip
+import heapq
+import json
+import logging
+import os
+import threading
+import time
+from array import array
+from collections import OrderedDict
+from datetime import datetime
+
+# Roll over to a new segment file once the current one reaches this size
+DEFAULT_SEGMENT_BYTES = 16 * 1024 * 1024
+# How long the writer thread waits before flushing buffered records to disk
+DEFAULT_FLUSH_INTERVAL = 0.05
+
+# Distinct (level, message) pairs kept in the top-messages rollup once it has been pruned
+DEFAULT_MESSAGE_ROLLUP_SIZE = 10000
+# Upper bound on buckets a single histogram() call may produce
+MAX_HISTOGRAM_BUCKETS = 2000
+
+# How often the maintenance thread applies retention and compacts segments
+DEFAULT_MAINTENANCE_INTERVAL = 30.0
+# Decoded cold segments kept in memory for reads
+DEFAULT_COLD_CACHE_SEGMENTS = 4
+
+SEGMENT_PREFIX = "segment-"
+SEGMENT_SUFFIX = ".jsonl"
+# Compressed columnar segments written by compaction, per codec
+COLD_SUFFIXES = {"gzip": ".cold.json.gz", "zstd": ".cold.json.zst"}
+COLD_COLUMNS = ("ts", "timestamp", "level", "source", "message")
+
+
+class LogStoreWriteError(RuntimeError):
+    """Raised once the writer thread has failed: new records could no longer reach disk."""
+
+
+class _Segment:
+    """
+    One segment file holding records with contiguous sequence numbers from first_seq.
+    A hot segment is append-only JSON lines and offsets[i] is the byte offset of record
+    first_seq + i; a cold segment is a compressed columnar file of length records,
+    written by compaction and read whole. size is the file's size in bytes.
+    """
+    __slots__ = ("first_seq", "path", "offsets", "size", "cold", "length")
+
+    def __init__(self, first_seq: int, path: str):
+        self.first_seq = first_seq
+        self.path = path
+        self.offsets = array("q")
+        self.size = 0
+        self.cold = False
+        self.length = 0
+
+    def __len__(self):
+        return self.length if self.cold else len(self.offsets)
+
+
+class LogStore:
+    """
+    Append-only log store made of segmented JSON-lines files with an in-memory
+    timestamp/level/source index. The index doubles as the rollup for counts and
+    time histograms (bisecting the posting lists); a bounded Misra-Gries (level, message)
+    counter is maintained alongside it for top-N messages.
+
+    append() only serializes the record and updates the index under a lock; a
+    background writer thread batches the encoded lines to disk, so callers never
+    wait on file I/O. Records not yet written are served from the write buffer. If the
+    writer fails (e.g. the disk is full), appends and flush() raise LogStoreWriteError
+    instead of buffering forever.
+
+    Segments roll over at segment_bytes or once their first record is segment_seconds
+    old. A maintenance thread drops the oldest segments beyond retention_seconds /
+    retention_bytes / retention_records and compacts segments older than compact_after
+    into compressed columnar files (cold_codec "gzip", or "zstd" with the zstandard
+    package). Reads span hot and cold segments transparently; the newest segment is
+    never compacted. The index and startup recovery grow with the records retained,
+    so retention_records is what bounds memory and restart time.
+    """
+
+    def __init__(self, directory: str, segment_bytes: int = DEFAULT_SEGMENT_BYTES,
+                 flush_interval: float = DEFAULT_FLUSH_INTERVAL,
+                 message_rollup_size: int = DEFAULT_MESSAGE_ROLLUP_SIZE,
+                 segment_seconds: float | None = None, retention_seconds: float | None = None,
+                 retention_bytes: int | None = None, retention_records: int | None = None,
+                 compact_after: float | None = None,
+                 cold_codec: str = "gzip", maintenance_interval: float = DEFAULT_MAINTENANCE_INTERVAL):
+        if cold_codec not in COLD_SUFFIXES:
+            raise ValueError(f"Unknown cold segment codec {cold_codec!r}, expected one of {tuple(COLD_SUFFIXES)}")
+        self.directory = directory
+        self.segment_bytes = segment_bytes
+        self.flush_interval = flush_interval
+        self.message_rollup_size = message_rollup_size
+        self.segment_seconds = segment_seconds
+        self.retention_seconds = retention_seconds
+        self.retention_bytes = retention_bytes
+        self.retention_records = retention_records
+        self.compact_after = compact_after
+        self.cold_codec = cold_codec
+        self.maintenance_interval = maintenance_interval
+
+        self._lock = threading.Lock()
+        self._has_pending = threading.Condition(self._lock)
+        self._became_durable = threading.Condition(self._lock)
+        self._segments: list[_Segment] = []
+        self._segment_starts: list[int] = []
+        self._next_seq = 0
+        # Oldest seq still retained; earlier records were dropped by retention
+        self._base_seq = 0
+
+        # Index: ingestion time per retained seq (_ts[seq - _base_seq], non-decreasing),
+        # and seq postings per level/source
+        self._ts = array("d")
+        self._by_level: dict[str, array] = {}
+        self._by_source: dict[str, array] = {}
+        # (level, message) -> Misra-Gries count; once pruned, counts are lower bounds
+        self._message_counts: dict[tuple[str, str], int] = {}
+        self._message_counts_pruned = False
+
+        # Encoded lines waiting for the writer; _durable_seq is the first seq not yet on disk
+        self._pending: list[bytes] = []
+        self._pending_start = 0
+        self._inflight: list[bytes] = []
+        self._inflight_start = 0
+        self._durable_seq = 0
+        # Set if the writer thread failed; appends and flushes raise it from then on
+        self._write_error: BaseException | None = None
+
+        # Files replaced by compaction or dropped by retention, deleted on the next
+        # maintenance pass so readers that looked them up just before keep working
+        self._retired_paths: list[str] = []
+        self._cold_cache: OrderedDict[str, dict[str, list]] = OrderedDict()
+        self._cold_cache_lock = threading.Lock()
+        self._maintenance_counters = {"compacted_segments": 0, "compacted_bytes_saved": 0,
+                                      "dropped_segments": 0, "dropped_records": 0}
+
+        os.makedirs(directory, exist_ok=True)
+        self._recover()
+
+        self._closed = False
+        self._writer = threading.Thread(target=self._writer_loop, name="log-store-writer", daemon=True)
+        self._writer.start()
+        self._stop_maintenance = threading.Event()
+        self._maintainer = None
+        if any(v is not None for v in (retention_seconds, retention_bytes, retention_records, compact_after)):
+            self._maintainer = threading.Thread(target=self._maintenance_loop, name="log-store-maintenance",
+                                                daemon=True)
+            self._maintainer.start()
+
+    # --- Write path ---
+
+    def append(self, message: str, level: str = "info", source: str = "") -> dict:
+        """
+        Appends a record and returns it (including its assigned seq).
+        """
+        with self._lock:
+            self._check_writer()
+            record = self._append_locked(message, level, source, None)
+        return record
+
+    def append_many(self, records: list[dict]) -> tuple[int, int]:
+        """
+        Appends {message, level, source, timestamp} dicts under a single lock
+        acquisition. Returns (first_seq, count).
+        """
+        with self._lock:
+            self._check_writer()
+            first_seq = self._next_seq
+            for r in records:
+                self._append_locked(r["message"], r.get("level", "info"), r.get("source", ""), r.get("timestamp"))
+        return first_seq, len(records)
+
+    def _append_locked(self, message: str, level: str, source: str, timestamp: str | None) -> dict:
+        now = time.time()
+        if self._ts and now < self._ts[-1]:
+            now = self._ts[-1]  # keep the time index sorted even if the wall clock steps back
+
+        seq = self._next_seq
+        record = {
+            "seq": seq,
+            "ts": now,
+            "timestamp": timestamp or datetime.fromtimestamp(now).strftime("%Y-%m-%d %H:%M:%S"),
+            "level": (level or "info").upper(),
+            "source": source or "",
+            "message": message,
+        }
+        line = (json.dumps(record, ensure_ascii=False) + "\n").encode("utf-8")
+
+        segment = self._segments[-1] if self._segments else None
+        if segment is None or segment.cold or (segment.size and (segment.size + len(line) > self.segment_bytes or (
+                self.segment_seconds is not None
+                and now - self._ts[segment.first_seq - self._base_seq] >= self.segment_seconds))):
+            segment = self._new_segment(seq)
+        segment.offsets.append(segment.size)
+        segment.size += len(line)
+
+        self._index(record)
+        if not self._pending:
+            self._pending_start = seq
+            self._has_pending.notify()
+        self._pending.append(line)
+        self._next_seq = seq + 1
+        return record
+
+    def _index(self, record: dict):
+        seq = record["seq"]
+        self._ts.append(record["ts"])
+        self._by_level.setdefault(record["level"], array("q")).append(seq)
+        self._by_source.setdefault(record["source"], array("q")).append(seq)
+
+        key = (record["level"], record["message"])
+        self._message_counts[key] = self._message_counts.get(key, 0) + 1
+        if len(self._message_counts) > 2 * self.message_rollup_size:
+            # Misra-Gries in batch: subtract the (k+1)-th largest count from every pair
+            # and drop those left at zero, so at most k survive. Each count undershoots
+            # by at most the total subtracted (<= appends / (k+1)), and any pair more
+            # frequent than that is never dropped; amortized O(log k) per append.
+            cut = heapq.nlargest(self.message_rollup_size + 1, self._message_counts.values())[-1]
+            self._message_counts = {k: c - cut for k, c in self._message_counts.items() if c > cut}
+            self._message_counts_pruned = True
+
+    def _new_segment(self, first_seq: int) -> _Segment:
+        path = os.path.join(self.directory, f"{SEGMENT_PREFIX}{first_seq:012d}{SEGMENT_SUFFIX}")
+        segment = _Segment(first_seq, path)
+        self._segments.append(segment)
+        self._segment_starts.append(first_seq)
+        return segment
+
+    def _check_writer(self):
+        if self._write_error is not None:
+            raise LogStoreWriteError(f"Log store writer failed: {self._write_error}") from self._write_error
+
+    def _writer_loop(self):
+        try:
+            self._write_batches()
+        except Exception as e:
+            logging.exception("Log store writer failed; rejecting further appends")
+            with self._lock:
+                self._write_error = e
+                self._became_durable.notify_all()
+
+    def _write_batches(self):
+        handle = None
+        handle_path = None
+        while True:
+            with self._lock:
+                while not self._pending and not self._closed:
+                    self._has_pending.wait()
+                if not self._pending and self._closed:
+                    break
+                closing = self._closed
+            if not closing:
+                time.sleep(self.flush_interval)  # let a burst accumulate so it goes out as one write
+
+            with self._lock:
+                batch, start = self._pending, self._pending_start
+                self._pending = []
+                self._inflight, self._inflight_start = batch, start
+                segments = self._segments_for(start, start + len(batch))
+
+            for segment, lo, hi in segments:
+                if handle_path != segment.path:
+                    if handle is not None:
+                        handle.close()
+                    handle = open(segment.path, "ab")
+                    handle_path = segment.path
+                handle.write(b"".join(batch[lo - start:hi - start]))
+            handle.flush()
+
+            with self._lock:
+                self._inflight = []
+                self._durable_seq = start + len(batch)
+                self._became_durable.notify_all()
+
+        if handle is not None:
+            handle.close()
+
+    def _segments_for(self, start: int, end: int) -> list[tuple[_Segment, int, int]]:
+        """
+        Splits the seq range [start, end) into per-segment (segment, lo, hi) runs.
+        """
+        runs = []
+        i = bisect.bisect_right(self._segment_starts, start) - 1
+        while start < end:
+            segment = self._segments[i]
+            hi = min(end, segment.first_seq + len(segment))
+            runs.append((segment, start, hi))
+            start = hi
+            i += 1
+        return runs
+
+    def flush(self, timeout: float | None = None) -> bool:
+        """
+        Blocks until everything appended so far is on disk. Raises LogStoreWriteError
+        if the writer thread has failed, rather than waiting for it forever.
+        """
+        with self._lock:
+            target = self._next_seq
+            done = self._became_durable.wait_for(
+                lambda: self._durable_seq >= target or self._write_error is not None, timeout)
+            self._check_writer()
+            return done
+
+    def close(self):
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            self._has_pending.notify_all()
+        self._stop_maintenance.set()
+        if self._maintainer is not None:
+            self._maintainer.join()
+        self._writer.join()
+
+    # --- Retention and compaction ---
+
+    def _maintenance_loop(self):
+        while not self._stop_maintenance.wait(self.maintenance_interval):
+            try:
+                self.maintain()
+            except Exception:
+                logging.exception("Log store maintenance failed")
+
+    def maintain(self, now: float | None = None):
+        """
+        Runs one maintenance pass: deletes files retired by the previous pass, drops
+        segments beyond the retention limits and compacts segments older than compact_after.
+        """
+        now = time.time() if now is None else now
+        with self._lock:
+            retired, self._retired_paths = self._retired_paths, []
+        for path in retired:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+        self._apply_retention(now)
+        if self.compact_after is None:
+            return
+        while True:
+            with self._lock:
+                segment = next((s for s in self._compactable() if self._last_ts(s) < now - self.compact_after), None)
+            if segment is None:
+                break
+            self._compact(segment)
+
+    def _last_ts(self, segment: _Segment) -> float:
+        return self._ts[segment.first_seq + len(segment) - 1 - self._base_seq]
+
+    def _compactable(self):
+        """
+        Hot segments that are complete (a newer segment exists) and fully on disk.
+        """
+        for segment in self._segments[:-1]:
+            if not segment.cold and segment.first_seq + len(segment) <= self._durable_seq:
+                yield segment
+
+    def _apply_retention(self, now: float):
+        with self._lock:
+            drop = 0
+            total_bytes = sum(s.size for s in self._segments)
+            total_records = self._next_seq - self._base_seq
+            for segment in self._segments[:-1]:
+                if segment.first_seq + len(segment) > self._durable_seq:
+                    break
+                too_old = self.retention_seconds is not None and self._last_ts(segment) < now - self.retention_seconds
+                too_big = self.retention_bytes is not None and total_bytes > self.retention_bytes
+                too_many = self.retention_records is not None and total_records > self.retention_records
+                if not (too_old or too_big or too_many):
+                    break
+                total_bytes -= segment.size
+                total_records -= len(segment)
+                drop += 1
+            if not drop:
+                return
+
+            dropped, self._segments = self._segments[:drop], self._segments[drop:]
+            del self._segment_starts[:drop]
+            new_base = self._segments[0].first_seq
+            del self._ts[:new_base - self._base_seq]
+            for postings in (self._by_level, self._by_source):
+                for key in list(postings):
+                    kept = postings[key][bisect.bisect_left(postings[key], new_base):]
+                    if kept:
+                        postings[key] = kept
+                    else:
+                        del postings[key]
+            self._maintenance_counters["dropped_segments"] += drop
+            self._maintenance_counters["dropped_records"] += new_base - self._base_seq
+            self._base_seq = new_base
+            self._retired_paths.extend(s.path for s in dropped)
+        with self._cold_cache_lock:
+            for segment in dropped:
+                self._cold_cache.pop(segment.path, None)
+
+    def _compact(self, segment: _Segment):
+        """
+        Rewrites a complete hot segment as a compressed columnar file and swaps it in.
+        """
+        columns = {name: [] for name in COLD_COLUMNS}
+        with open(segment.path, "rb") as f:
+            for line in f:
+                record = json.loads(line)
+                for name in COLD_COLUMNS:
+                    columns[name].append(record[name])
+
+        path = segment.path[:-len(SEGMENT_SUFFIX)] + COLD_SUFFIXES[self.cold_codec]
+        data = _compress(json.dumps(columns, ensure_ascii=False).encode("utf-8"), self.cold_codec)
+        with open(path + ".tmp", "wb") as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(path + ".tmp", path)
+
+        with self._lock:
+            hot_path, hot_size = segment.path, segment.size
+            segment.length = len(segment.offsets)
+            segment.cold = True
+            segment.offsets = array("q")
+            segment.path = path
+            segment.size = len(data)
+            self._retired_paths.append(hot_path)
+            self._maintenance_counters["compacted_segments"] += 1
+            self._maintenance_counters["compacted_bytes_saved"] += hot_size - len(data)
+
+    def _cold_columns(self, path: str) -> dict[str, list]:
+        """
+        Returns a cold segment's decoded columns, from a small LRU of recently read segments.
+        """
+        with self._cold_cache_lock:
+            columns = self._cold_cache.get(path)
+            if columns is not None:
+                self._cold_cache.move_to_end(path)
+                return columns
+        with open(path, "rb") as f:
+            columns = json.loads(_decompress(f.read(), path))
+        with self._cold_cache_lock:
+            self._cold_cache[path] = columns
+            while len(self._cold_cache) > DEFAULT_COLD_CACHE_SEGMENTS:
+                self._cold_cache.popitem(last=False)
+        return columns
+
+    def stats(self) -> dict:
+        with self._lock:
+            hot = [s for s in self._segments if not s.cold]
+            cold = [s for s in self._segments if s.cold]
+            return {
+                "first_seq": self._base_seq,
+                "next_seq": self._next_seq,
+                "records": self._next_seq - self._base_seq,
+                "hot_segments": len(hot),
+                "hot_bytes": sum(s.size for s in hot),
+                "cold_segments": len(cold),
+                "cold_bytes": sum(s.size for s in cold),
+                "cold_codec": self.cold_codec,
+                "writer_error": None if self._write_error is None else str(self._write_error),
+                **self._maintenance_counters,
+            }
+
+    # --- Read path ---
+
+    def __len__(self):
+        return self._next_seq
+
+    def retained(self) -> int:
+        """
+        Number of records still in the store (len() minus those dropped by retention).
+        """
+        return self._next_seq - self._base_seq
+
+    def get(self, seqs) -> list[dict]:
+        """
+        Returns the records for the given seqs, in the order given.
+        """
+        seqs = list(seqs)
+        found: dict[int, dict] = {}
+        on_disk: dict[str, list[tuple[int, int]]] = {}
+        in_cold: dict[str, list[tuple[int, int]]] = {}
+        with self._lock:
+            for seq in seqs:
+                if seq < self._base_seq or seq >= self._next_seq:
+                    continue
+                if seq >= self._pending_start and self._pending and seq - self._pending_start < len(self._pending):
+                    found[seq] = json.loads(self._pending[seq - self._pending_start])
+                elif seq >= self._durable_seq:
+                    found[seq] = json.loads(self._inflight[seq - self._inflight_start])
+                else:
+                    segment = self._segments[bisect.bisect_right(self._segment_starts, seq) - 1]
+                    if segment.cold:
+                        in_cold.setdefault(segment.path, []).append((seq - segment.first_seq, seq))
+                    else:
+                        on_disk.setdefault(segment.path, []).append((segment.offsets[seq - segment.first_seq], seq))
+
+        for path, entries in on_disk.items():
+            with open(path, "rb") as f:
+                for offset, seq in sorted(entries):
+                    f.seek(offset)
+                    found[seq] = json.loads(f.readline())
+
+        for path, entries in in_cold.items():
+            columns = self._cold_columns(path)
+            for i, seq in entries:
+                found[seq] = {"seq": seq, **{name: columns[name][i] for name in COLD_COLUMNS}}
+
+        return [found[seq] for seq in seqs if seq in found]
+
+    def query(self, cursor: int | None = None, limit: int = 100, levels: list[str] | None = None,
+              sources: list[str] | None = None, since: float | None = None, until: float | None = None,
+              contains: str | None = None) -> tuple[list[dict], int | None]:
+        """
+        Returns up to limit matching records, newest first, and the cursor for the next
+        (older) page, or None when there are no more. cursor is exclusive: only records
+        with seq < cursor are considered. since/until are epoch seconds (until exclusive)
+        and compare against ingestion time; contains is a case-insensitive substring
+        match on the message.
+        """
+        with self._lock:
+            lo = self._seq_at(since, self._base_seq)
+            hi = self._seq_at(until, self._next_seq)
+            if cursor is not None:
+                hi = min(hi, cursor)
+            candidates = self._candidates(lo, hi, levels, sources)
+
+        needle = contains.lower() if contains else None
+        chunk = limit if needle is None else max(limit * 4, 256)
+        matches: list[dict] = []
+        for batch in _chunks(candidates, chunk):
+            for record in self.get(batch):
+                if needle is None or needle in record["message"].lower():
+                    matches.append(record)
+                    if len(matches) == limit:
+                        return matches, record["seq"]
+        return matches, None
+
+    def seq_range(self, since: float | None = None, until: float | None = None) -> tuple[int, int]:
+        """
+        Returns the retained seq range [lo, hi) ingested within [since, until) (epoch seconds).
+        """
+        with self._lock:
+            return self._seq_at(since, self._base_seq), self._seq_at(until, self._next_seq)
+
+    def _seq_at(self, t: float | None, default: int = 0) -> int:
+        """
+        First retained seq ingested at or after t (epoch seconds); default if t is None.
+        """
+        if t is None:
+            return default
+        return self._base_seq + bisect.bisect_left(self._ts, t)
+
+    def _candidates(self, lo: int, hi: int, levels, sources):
+        """
+        Yields, newest first, the seqs in [lo, hi) that pass the level and source
+        filters, using the posting lists. Called with the lock held; the postings are
+        sliced here so the generator is safe to consume after the lock is released.
+        """
+        if hi <= lo:
+            return iter(())
+        selected = []
+        for postings, wanted in ((self._by_level, levels), (self._by_source, sources)):
+            if wanted:
+                keys = {k.upper() for k in wanted} if postings is self._by_level else set(wanted)
+                selected.append([_slice(postings[k], lo, hi) for k in keys if k in postings])
+        if not selected:
+            return iter(range(hi - 1, lo - 1, -1))
+
+        merged = [_merge_desc(runs) for runs in selected]
+        if len(merged) == 1:
+            return merged[0]
+        # Intersect level and source candidates; probe the second side with bisect
+        other = sorted(seq for runs in selected[1] for seq in runs)
+        return (seq for seq in merged[0] if _contains(other, seq))
+
+    def read_from(self, cursor: int, limit: int = 500, levels: list[str] | None = None) -> tuple[list[dict], int]:
+        """
+        Returns up to limit records with seq >= cursor, oldest first, and the cursor to
+        pass next time (one past the last seq examined).
+        """
+        with self._lock:
+            end = self._next_seq
+            cursor = max(cursor, self._base_seq)
+            if limit <= 0:
+                return [], cursor
+            if levels:
+                runs = [_slice(self._by_level[k.upper()], cursor, end) for k in levels if k.upper() in self._by_level]
+                seqs = list(heapq.merge(*runs))[:limit]
+                next_cursor = seqs[-1] + 1 if len(seqs) == limit else end
+            else:
+                seqs = range(cursor, min(end, cursor + limit))
+                next_cursor = max(cursor, seqs.stop)
+        return self.get(seqs), next_cursor
+
+    # --- Aggregations ---
+
+    def _postings_for(self, by: str) -> dict[str, array]:
+        if by == "level":
+            return self._by_level
+        if by == "source":
+            return self._by_source
+        raise ValueError(f"Cannot aggregate by {by!r}, expected 'level' or 'source'")
+
+    def counts(self, by: str = "level", since: float | None = None, until: float | None = None) -> dict[str, int]:
+        """
+        Returns record counts per level or source, optionally within [since, until)
+        (epoch seconds, ingestion time). Costs two bisects per key, not a scan.
+        """
+        with self._lock:
+            postings = self._postings_for(by)
+            lo = self._seq_at(since, self._base_seq)
+            hi = self._seq_at(until, self._next_seq)
+            counts = {
+                key: bisect.bisect_left(seqs, hi) - bisect.bisect_left(seqs, lo)
+                for key, seqs in postings.items()
+            }
+        return {key: n for key, n in sorted(counts.items()) if n}
+
+    def histogram(self, bucket_seconds: float, by: str = "level", since: float | None = None,
+                  until: float | None = None) -> tuple[list[float], dict[str, list[int]]]:
+        """
+        Returns (bucket start times, {key: count per bucket}) for buckets of
+        bucket_seconds aligned to the epoch, covering [since, until) or the whole store.
+        """
+        if bucket_seconds <= 0:
+            raise ValueError("bucket_seconds must be positive")
+        with self._lock:
+            postings = self._postings_for(by)
+            if not self._ts:
+                return [], {}
+            since = self._ts[0] if since is None else since
+            if until is None:
+                until = (self._ts[-1] // bucket_seconds + 1) * bucket_seconds
+            first = since // bucket_seconds * bucket_seconds
+            n_buckets = max(0, int(-(-(until - first) // bucket_seconds)))
+            if n_buckets > MAX_HISTOGRAM_BUCKETS:
+                raise ValueError(f"{n_buckets} buckets requested, at most {MAX_HISTOGRAM_BUCKETS} allowed")
+            starts = [first + i * bucket_seconds for i in range(n_buckets)]
+            # Seq boundaries of each bucket, clamped to [since, until)
+            edges = [self._seq_at(max(since, t)) for t in starts]
+            edges.append(self._seq_at(until))
+            series = {}
+            for key, seqs in sorted(postings.items()):
+                positions = [bisect.bisect_left(seqs, edge) for edge in edges]
+                counts = [b - a for a, b in zip(positions, positions[1:])]
+                if any(counts):
+                    series[key] = counts
+        return starts, series
+
+    def top_messages(self, limit: int = 10, levels: list[str] | None = None) -> tuple[list[dict], bool]:
+        """
+        Returns the most frequent (level, message) pairs as [{level, message, count}]
+        and whether the counts are approximate (the rollup has been pruned, so counts
+        are lower bounds, off by at most appends / (message_rollup_size + 1), and rare
+        messages may be missing).
+        """
+        wanted = {k.upper() for k in levels} if levels else None
+        with self._lock:
+            items = [
+                (count, level, message)
+                for (level, message), count in self._message_counts.items()
+                if wanted is None or level in wanted
+            ]
+            approximate = self._message_counts_pruned
+        top = heapq.nlargest(limit, items)
+        return [{"level": level, "message": message, "count": count} for count, level, message in top], approximate
+
+    # --- Recovery ---
+
+    def _recover(self):
+        names = {}
+        for name in os.listdir(self.directory):
+            if not name.startswith(SEGMENT_PREFIX):
+                continue
+            if name.endswith(".tmp"):
+                os.remove(os.path.join(self.directory, name))  # compaction interrupted before the swap
+                continue
+            first_seq = name[len(SEGMENT_PREFIX):].split(".", 1)[0]
+            if first_seq.isdigit():
+                names.setdefault(int(first_seq), []).append(name)
+
+        for first_seq in sorted(names):
+            cold = [name for name in names[first_seq] if not name.endswith(SEGMENT_SUFFIX)]
+            if cold:
+                # A crash after compaction may have left the hot file behind; the cold one is complete
+                for name in names[first_seq]:
+                    if name.endswith(SEGMENT_SUFFIX):
+                        os.remove(os.path.join(self.directory, name))
+                self._recover_cold(first_seq, os.path.join(self.directory, cold[0]))
+            else:
+                self._recover_hot(first_seq)
+            if len(self._segments) == 1:
+                self._base_seq = first_seq
+            self._next_seq = first_seq + len(self._segments[-1])
+        self._durable_seq = self._pending_start = self._next_seq
+
+    def _recover_hot(self, first_seq: int):
+        segment = self._new_segment(first_seq)
+        with open(segment.path, "rb+") as f:
+            offset = 0
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break  # torn write from a crash; drop the partial record
+                record = json.loads(line)
+                segment.offsets.append(offset)
+                self._index(record)
+                offset += len(line)
+            f.truncate(offset)
+        segment.size = offset
+
+    def _recover_cold(self, first_seq: int, path: str):
+        segment = self._new_segment(first_seq)
+        segment.path = path
+        segment.cold = True
+        segment.size = os.path.getsize(path)
+        with open(path, "rb") as f:
+            columns = json.loads(_decompress(f.read(), path))
+        segment.length = len(columns["ts"])
+        for i in range(segment.length):
+            self._index({"seq": first_seq + i, **{name: columns[name][i] for name in COLD_COLUMNS}})
+
+
+def _slice(postings: array, lo: int, hi: int) -> array:
+    return postings[bisect.bisect_left(postings, lo):bisect.bisect_left(postings, hi)]
+
+
+def _merge_desc(runs: list[array]):
+    return heapq.merge(*(reversed(run) for run in runs), reverse=True)
+
+
+def _contains(sorted_seqs: list[int], seq: int) -> bool:
+    i = bisect.bisect_left(sorted_seqs, seq)
+    return i < len(sorted_seqs) and sorted_seqs[i] == seq
+
+
+def _chunks(iterable, size: int):
+    chunk = []
+    for item in iterable:
+        chunk.append(item)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def _compress(data: bytes, codec: str) -> bytes:
+    if codec == "zstd":
+        import zstandard
+
+        return zstandard.ZstdCompressor(level=9).compress(data)
+    return gzip.compress(data, compresslevel=6)
+
+
+def _decompress(data: bytes, path: str) -> bytes:
+    if path.endswith(COLD_SUFFIXES["zstd"]):
+        import zstandard
+
+        return zstandard.ZstdDecompressor().decompress(data)
+    return gzip.decompress(data)
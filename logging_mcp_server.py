@@ -1,16 +1,292 @@
+import time
+_import_started = time.perf_counter()
+
+import asyncio
+import atexit
+import base64
+import concurrent.futures
+import importlib
+import inspect
+import json
 import logging
-from fastmcp import FastMCP
+import os
+import threading
+from datetime import datetime
+from fastmcp import Context, FastMCP
+
+import chart_render
+from log_search import LogSearchIndex, SearchSyntaxError
+from log_sink import AsyncLogSink
+from log_store import LogStore, LogStoreWriteError
+from mermaid_render import MermaidRenderer, MermaidRenderError
+from result_cache import ResultCache, cached
+from server_metrics import ResponseSizeMiddleware, ToolMetrics, instrumented
+from tool_scheduler import Lane, SchedulerMiddleware, ToolScheduler
+
+# Configure logging for the server: records go through a bounded queue to a listener
+# thread that writes stderr, so log calls in tool handlers never block on the sink
+_stderr_handler = logging.StreamHandler()
+_stderr_handler.setFormatter(logging.Formatter('%(asctime)s - %(levelname)s - %(message)s'))
+log_sink = AsyncLogSink(
+    [_stderr_handler],
+    level=logging.INFO,
+    maxsize=int(os.environ.get("LOG_SINK_QUEUE_SIZE", "10000")),
+    overflow=os.environ.get("LOG_SINK_OVERFLOW", "drop-oldest"),
+    sample_every=int(os.environ.get("LOG_SINK_SAMPLE_EVERY", "10")),
+)
+atexit.register(log_sink.stop)
+
+def _env_number(name: str, cast=float, default: str = ""):
+    value = os.environ.get(name, default)
+    return cast(value) if value else None
+
+# Persistent store backing log_message / get_logs_table. Segments roll over by size or age;
+# retention drops the oldest past LOG_RETENTION_SECONDS / LOG_RETENTION_BYTES /
+# LOG_RETENTION_RECORDS, and segments older than LOG_COMPACT_AFTER seconds are compacted
+# into compressed columnar files. The in-memory index and startup recovery (~6s per million
+# records) scale with what is retained, hence the default limits; set one empty to lift it
+LOG_STORE_DIR = os.environ.get("LOG_STORE_DIR", "log_store")
+store = LogStore(
+    LOG_STORE_DIR,
+    segment_bytes=int(os.environ.get("LOG_SEGMENT_BYTES", str(16 * 1024 * 1024))),
+    segment_seconds=float(os.environ.get("LOG_SEGMENT_SECONDS", "3600")),
+    retention_seconds=_env_number("LOG_RETENTION_SECONDS", default=str(7 * 24 * 3600)),
+    retention_bytes=_env_number("LOG_RETENTION_BYTES", int),
+    retention_records=_env_number("LOG_RETENTION_RECORDS", int, default="5000000"),
+    compact_after=float(os.environ.get("LOG_COMPACT_AFTER", "3600")),
+    cold_codec=os.environ.get("LOG_COLD_CODEC", "gzip"),
+)
+atexit.register(store.close)
+# Full-text index over the store for search_logs, kept next to it and updated in the background;
+# the ingest tools wake the indexer so new records become searchable without waiting for its poll
+search_index = LogSearchIndex(store)
+atexit.register(search_index.close)
+LOG_COLUMNS = ("seq", "timestamp", "level", "source", "message")
+# Largest page get_logs_table returns in one response
+LOG_TABLE_MAX_LIMIT = 5000
+# How often a following tail_logs call checks the store for new records
+TAIL_POLL_INTERVAL = 0.2 # seconds
+# Longest a following tail_logs call may stay open (it holds a scheduler slot meanwhile)
+TAIL_MAX_FOLLOW = 30.0 # seconds
+
+# Pure tools advertise themselves as idempotent plus a cache_ttl (seconds) so clients may memoize them
+CLIENT_CACHE_TTL = float(os.environ.get("CLIENT_CACHE_TTL", "3600"))
+PURE_TOOL_HINTS = {
+    "annotations": {"readOnlyHint": True, "idempotentHint": True},
+    "meta": {"cache_ttl": CLIENT_CACHE_TTL},
+}
+
+# Chart tools are deterministic in their arguments, so their serialized figures are cached
+chart_cache = ResultCache(
+    max_entries=int(os.environ.get("CHART_CACHE_SIZE", "256")),
+    ttl=float(os.environ.get("CHART_CACHE_TTL", "3600")),
+    max_bytes=int(os.environ.get("CHART_CACHE_BYTES", str(64 * 1024 * 1024))),
+)
+
+# Chart rendering is CPU-bound. With CHART_WORKERS > 0 it runs in that many worker processes,
+# so it neither holds the GIL against log ingestion nor makes cheap calls wait behind it
+CHART_WORKERS = int(os.environ.get("CHART_WORKERS", "0"))
+# Longest a tool call waits for a chart worker to return a figure
+CHART_TIMEOUT = float(os.environ.get("CHART_TIMEOUT", "60")) # seconds
+_chart_pool = None
+_chart_pool_lock = threading.Lock()
+
+def get_chart_pool():
+    """
+    Returns the chart worker pool, starting it on first use; None when CHART_WORKERS is 0.
+    Workers are spawned (not forked from this multi-threaded process) and import only
+    chart_render, never this module's store or sink.
+    """
+    global _chart_pool
+    with _chart_pool_lock:
+        if _chart_pool is None and CHART_WORKERS > 0:
+            import multiprocessing
+            from concurrent.futures import ProcessPoolExecutor
+
+            _chart_pool = ProcessPoolExecutor(CHART_WORKERS, mp_context=multiprocessing.get_context("spawn"),
+                                              initializer=chart_render.init_worker, initargs=(os.getpid(),))
+            atexit.register(_chart_pool.shutdown, cancel_futures=True)
+        return _chart_pool
 
-# Configure basic logging for the server
-logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+def _discard_chart_pool(pool):
+    """
+    Forgets a broken pool (unless another call already replaced it) so the next
+    get_chart_pool() starts a fresh one.
+    """
+    global _chart_pool
+    with _chart_pool_lock:
+        if _chart_pool is pool:
+            _chart_pool = None
+    pool.shutdown(wait=False, cancel_futures=True)
+
+def run_chart(fn, **kwargs):
+    """
+    Runs a chart_render builder in the worker pool if there is one, otherwise inline.
+    Arguments are passed by keyword so they cannot shift if either signature changes.
+    If a worker died (BrokenProcessPool) the pool is rebuilt and the call retried once;
+    a render taking longer than CHART_TIMEOUT is reported as an error.
+    """
+    for attempt in range(2):
+        pool = get_chart_pool()
+        if pool is None:
+            return fn(**kwargs)
+        try:
+            future = pool.submit(fn, **kwargs)
+            return future.result(timeout=CHART_TIMEOUT)
+        except concurrent.futures.BrokenExecutor:
+            logging.warning("Chart worker pool is broken, restarting it")
+            _discard_chart_pool(pool)
+        except concurrent.futures.TimeoutError:
+            future.cancel()
+            return {"status": "error", "message": f"Chart rendering timed out after {CHART_TIMEOUT:g} seconds"}
+    return {"status": "error", "message": "Chart worker crashed while rendering"}
 
 # Initialize the FastMCP server
 mcp = FastMCP(name="logging-server")
 
+# Per-tool call/latency/size metrics, exposed via get_server_metrics and GET /metrics
+tool_metrics = ToolMetrics()
+mcp.add_middleware(ResponseSizeMiddleware(tool_metrics))
+
+# Admission control: log ingestion is a high-priority lane that keeps SCHEDULER_RESERVED_SLOTS
+# to itself, so bursts of queries or chart renders cannot starve it. Each lane has a per-client
+# token bucket (calls/second, burst); tools without a lane (metrics, reports) are not scheduled.
+tool_scheduler = ToolScheduler(
+    lanes={
+        "ingest": Lane("ingest", rate=float(os.environ.get("INGEST_RATE", "500")),
+                       burst=float(os.environ.get("INGEST_BURST", "1000")), priority=True),
+        "query": Lane("query", rate=float(os.environ.get("QUERY_RATE", "20")),
+                      burst=float(os.environ.get("QUERY_BURST", "40"))),
+        "chart": Lane("chart", rate=float(os.environ.get("CHART_RATE", "5")),
+                      burst=float(os.environ.get("CHART_BURST", "20"))),
+    },
+    tool_lanes={
+        "log_message": "ingest", "log_messages": "ingest",
+        "get_logs_table": "query", "get_log_counts": "query", "get_log_histogram": "query",
+        "get_top_messages": "query", "tail_logs": "query", "search_logs": "query",
+        "generate_pie_chart": "chart", "generate_sunburst_chart": "chart",
+        "generate_level_breakdown_chart": "chart", "generate_mermaid_diagram": "query",
+        "render_mermaid_svg": "chart",
+    },
+    tool_limits={
+        "get_logs_table": 8,
+        "tail_logs": 16,
+        "generate_pie_chart": max(2, CHART_WORKERS),
+        "generate_sunburst_chart": max(2, CHART_WORKERS),
+        "generate_level_breakdown_chart": max(2, CHART_WORKERS),
+        "render_mermaid_svg": 2,
+    },
+    max_concurrent=int(os.environ.get("SCHEDULER_MAX_CONCURRENT", "64")),
+    reserved_slots=int(os.environ.get("SCHEDULER_RESERVED_SLOTS", "8")),
+    max_wait=float(os.environ.get("SCHEDULER_MAX_WAIT", "2.0")),
+)
+mcp.add_middleware(SchedulerMiddleware(tool_scheduler, is_cached=chart_cache.has_call))
+
+@mcp.custom_route("/metrics", methods=["GET"])
+async def prometheus_metrics(request):
+    from starlette.responses import PlainTextResponse
+
+    sink = log_sink.stats()
+    sink_lines = (
+        "# HELP mcp_log_sink_dropped_total Log records dropped by the sink's overflow policy.\n"
+        "# TYPE mcp_log_sink_dropped_total counter\n"
+        f"mcp_log_sink_dropped_total {sink['dropped']}\n"
+        "# HELP mcp_log_sink_queue_size Log records waiting for the sink listener.\n"
+        "# TYPE mcp_log_sink_queue_size gauge\n"
+        f"mcp_log_sink_queue_size {sink['queue_size']}\n"
+    )
+    scheduler = tool_scheduler.stats()
+    scheduler_lines = (
+        "# HELP mcp_scheduler_rejected_total Tool calls refused by the scheduler.\n"
+        "# TYPE mcp_scheduler_rejected_total counter\n"
+        f'mcp_scheduler_rejected_total{{reason="rate_limited"}} {scheduler["rate_limited"]}\n'
+        f'mcp_scheduler_rejected_total{{reason="overloaded"}} {scheduler["overloaded"]}\n'
+        "# HELP mcp_scheduler_deferred_total Tool calls that waited for a free slot.\n"
+        "# TYPE mcp_scheduler_deferred_total counter\n"
+        f"mcp_scheduler_deferred_total {scheduler['deferred']}\n"
+        "# HELP mcp_scheduler_running Tool calls currently holding a scheduler slot.\n"
+        "# TYPE mcp_scheduler_running gauge\n"
+        f"mcp_scheduler_running {scheduler['running']}\n"
+    )
+    log_store = store.stats()
+    store_lines = (
+        "# HELP mcp_log_store_bytes Log store segment bytes on disk.\n"
+        "# TYPE mcp_log_store_bytes gauge\n"
+        f'mcp_log_store_bytes{{tier="hot"}} {log_store["hot_bytes"]}\n'
+        f'mcp_log_store_bytes{{tier="cold"}} {log_store["cold_bytes"]}\n'
+        "# HELP mcp_log_store_records Log records retained in the store.\n"
+        "# TYPE mcp_log_store_records gauge\n"
+        f"mcp_log_store_records {log_store['records']}\n"
+    )
+    return PlainTextResponse(tool_metrics.prometheus() + sink_lines + scheduler_lines + store_lines,
+                             media_type="text/plain; version=0.0.4")
+
+@mcp.tool(name="get_server_metrics", description="Returns per-tool call counts, error counts and latency/size histograms.")
+def get_server_metrics():
+    """
+    Reports the metrics recorded for every tool since startup, plus log sink, scheduler,
+    log store (hot/cold segments, retention, compaction) and Mermaid renderer counters.
+    """
+    return {"status": "success", **tool_metrics.snapshot(), "log_sink": log_sink.stats(),
+            "scheduler": tool_scheduler.stats(), "log_store": store.stats(), "mermaid": mermaid_renderer.stats()}
+
 @mcp.tool(name="log_message", description="Logs a message with a specified level.")
-def log_message(message: str, level: str = "info"):
+@instrumented(tool_metrics)
+def log_message(message: str, level: str = "info", source: str = "mcp"):
+    """
+    Logs a message using the server's logger and appends it to the log store.
+    """
+    try:
+        record = store.append(message, level, source)
+    except LogStoreWriteError as e:
+        return {"status": "error", "message": str(e)}
+    search_index.notify()
+    _emit(message, level)
+    return {"status": "success", "message": f"Logged: {message} with level {level}", "seq": record["seq"]}
+
+# Acknowledgements of recent log_messages batches by batch_id, so a resent batch is not stored twice
+batch_acks = ResultCache(max_entries=int(os.environ.get("LOG_BATCH_DEDUP_SIZE", "10000")),
+                         ttl=float(os.environ.get("LOG_BATCH_DEDUP_TTL", "3600")))
+_batch_ack_lock = threading.Lock()
+
+@mcp.tool(name="log_messages", description="Logs a batch of messages with a single call.")
+@instrumented(tool_metrics)
+def log_messages(records: list[dict], batch_id: str | None = None):
+    """
+    Appends a batch of {message, level, source, timestamp} records to the log store.
+    Only "message" is required; the other fields must be strings when present. The
+    batch is validated as a whole first, so it is either stored entirely or not at all,
+    and acknowledged in one response. A batch resent with the batch_id of one already
+    stored gets the original acknowledgement (with "duplicate": true) and is not stored again.
+    """
+    for i, r in enumerate(records):
+        if not isinstance(r, dict) or not isinstance(r.get("message"), str):
+            return {"status": "error", "message": f"Record {i} is missing a string 'message'"}
+        for field in ("level", "source", "timestamp"):
+            if field in r and not isinstance(r[field], str):
+                return {"status": "error", "message": f"Record {i} has a non-string '{field}'"}
+
+    try:
+        if batch_id is None:
+            first_seq, count = store.append_many(records)
+        else:
+            with _batch_ack_lock:
+                ack = batch_acks.get(batch_id)
+                if ack is not None:
+                    return {**ack, "duplicate": True}
+                first_seq, count = store.append_many(records)
+                batch_acks.put(batch_id, {"status": "success", "message": f"Logged {count} records",
+                                          "first_seq": first_seq, "count": count})
+    except LogStoreWriteError as e:
+        return {"status": "error", "message": str(e)}
+    search_index.notify()
+    for r in records:
+        _emit(r["message"], r.get("level", "info"))
+    return {"status": "success", "message": f"Logged {count} records", "first_seq": first_seq, "count": count}
+
+def _emit(message: str, level: str):
     """
-    Logs a message using the server's logger.
+    Forwards a message to the server's stdlib logger.
     """
     if level.lower() == "info":
         logging.info(message)
@@ -20,128 +296,250 @@ def log_message(message: str, level: str = "info"):
         logging.error(message)
     else:
         logging.debug(message) # Default to debug for unknown levels
-    return {"status": "success", "message": f"Logged: {message} with level {level}"}
 
-@mcp.tool(name="get_logs_table", description="Returns a table of simulated log data.")
-def get_logs_table():
+@mcp.tool(name="get_logs_table", description="Returns a page of log entries from the log store, newest first, with optional filters.")
+@instrumented(tool_metrics)
+def get_logs_table(limit: int = 100, cursor: int | None = None, levels: list[str] | None = None,
+                   sources: list[str] | None = None, since: str | None = None, until: str | None = None,
+                   contains: str | None = None, format: str = "columns"):
     """
-    Returns a list of dictionaries representing log entries.
+    Returns one page of log entries in a columnar layout.
+
+    Args:
+        limit: Maximum number of rows in the page, 1 to LOG_TABLE_MAX_LIMIT
+        cursor: "next_cursor" from the previous page; omit for the newest entries
+        levels, sources: Only include entries with these levels / sources
+        since, until: Time range as "YYYY-MM-DD HH:MM:SS" (until is exclusive)
+        contains: Case-insensitive substring the message must contain
+        format: "columns" (dict of column arrays), "arrow" (base64 Arrow IPC stream) or "records" (list of dicts)
     """
-    logs = [
-        {"timestamp": "2025-07-06 01:00:00", "level": "INFO", "message": "User logged in"},
-        {"timestamp": "2025-07-06 01:01:00", "level": "WARNING", "message": "High CPU usage detected"},
-        {"timestamp": "2025-07-06 01:02:00", "level": "ERROR", "message": "Database connection failed"},
-        {"timestamp": "2025-07-06 01:03:00", "level": "INFO", "message": "Report generated"},
-        {"timestamp": "2025-07-06 01:04:00", "level": "DEBUG", "message": "Function X completed"},
-    ]
-    return {"status": "success", "data": logs}
+    if not 1 <= limit <= LOG_TABLE_MAX_LIMIT:
+        return {"status": "error", "message": f"limit must be between 1 and {LOG_TABLE_MAX_LIMIT}"}
+    try:
+        since_ts, until_ts = _parse_time_range(since, until)
+    except ValueError as e:
+        return {"status": "error", "message": f"Invalid time range: {e}"}
+
+    records, next_cursor = store.query(cursor, limit, levels, sources, since_ts, until_ts, contains)
+    columns = {name: [r[name] for r in records] for name in LOG_COLUMNS}
+    response = {"status": "success", "next_cursor": next_cursor, "total": store.retained()}
+
+    if format == "records":
+        response["data"] = [{name: r[name] for name in LOG_COLUMNS} for r in records]
+    elif format == "arrow":
+        import pyarrow as pa
+
+        sink = pa.BufferOutputStream()
+        table = pa.table(columns)
+        with pa.ipc.new_stream(sink, table.schema) as writer:
+            writer.write_table(table)
+        response["arrow"] = base64.b64encode(sink.getvalue().to_pybytes()).decode("ascii")
+    else:
+        response["columns"] = columns
+    return response
 
-@mcp.tool(name="generate_pie_chart", description="Generates a Plotly pie chart.")
-def generate_pie_chart(labels: list[str], values: list[float], title: str = "Pie Chart"):
+@mcp.tool(name="search_logs", description="Full-text search over log messages, sources and levels; best matches first.")
+@instrumented(tool_metrics)
+def search_logs(query: str, limit: int = 50, since: str | None = None, until: str | None = None,
+                order: str = "rank"):
     """
-    Generates a Plotly pie chart and returns it as an HTML string.
+    Searches the full-text index and returns the top matches in a columnar layout
+    (LOG_COLUMNS plus "score", BM25 where lower is better).
+
+    Args:
+        query: Words to match; supports "exact phrases", prefix*, AND/OR/NOT and
+               column filters such as level:error or source:agent
+        limit: Maximum number of matches, 1 to LOG_TABLE_MAX_LIMIT
+        since, until: Time range as "YYYY-MM-DD HH:MM:SS" (until is exclusive)
+        order: "rank" for best match first, "newest" for most recent first
     """
-    import plotly.graph_objects as go
+    if not 1 <= limit <= LOG_TABLE_MAX_LIMIT:
+        return {"status": "error", "message": f"limit must be between 1 and {LOG_TABLE_MAX_LIMIT}"}
+    try:
+        since_ts, until_ts = _parse_time_range(since, until)
+    except ValueError as e:
+        return {"status": "error", "message": f"Invalid time range: {e}"}
 
-    fig = go.Figure(data=[go.Pie(labels=labels, values=values)])
-    fig.update_layout(title_text=title)
-    return {"status": "success", "chart_json": fig.to_json()}
+    # Index what is still pending if it is no more than one batch, so fresh records are searchable
+    if 0 < search_index.lag() <= search_index.batch:
+        search_index.catch_up()
+    try:
+        matches = search_index.search(query, limit, since_ts, until_ts, order)
+    except (SearchSyntaxError, ValueError) as e:
+        return {"status": "error", "message": str(e)}
+    columns = {name: [m[name] for m in matches] for name in (*LOG_COLUMNS, "score")}
+    return {"status": "success", "columns": columns, "count": len(matches), "index_lag": search_index.lag()}
 
-@mcp.tool(name="generate_sunburst_chart", description="Generates a Plotly sunburst chart for hierarchical data visualization.")
-def generate_sunburst_chart(data_type: str = "company_structure"):
+def _parse_time_range(since: str | None, until: str | None) -> tuple[float | None, float | None]:
     """
-    Generates a Plotly sunburst chart with interesting hierarchical data.
-    
+    Converts "YYYY-MM-DD HH:MM:SS" bounds to epoch seconds; raises ValueError if malformed.
+    """
+    since_ts = datetime.fromisoformat(since).timestamp() if since else None
+    until_ts = datetime.fromisoformat(until).timestamp() if until else None
+    return since_ts, until_ts
+
+@mcp.tool(name="get_log_counts", description="Returns log record counts per level or source, optionally within a time range.")
+@instrumented(tool_metrics)
+def get_log_counts(by: str = "level", since: str | None = None, until: str | None = None):
+    """
+    Counts log records per level or source from the store's index (no rescan of records).
+
     Args:
-        data_type: Type of data to visualize ("company_structure", "tech_stack", "sales_regions", "project_breakdown")
+        by: "level" or "source"
+        since, until: Time range as "YYYY-MM-DD HH:MM:SS" (until is exclusive)
     """
-    import plotly.express as px
-    import pandas as pd
-    
-    # Define different interesting datasets
-    datasets = {
-        "company_structure": {
-            "names": ["TechCorp", "Engineering", "Sales", "Marketing", "HR", 
-                     "Frontend", "Backend", "DevOps", "Direct Sales", "Online Sales", 
-                     "Channel Partners", "Content Marketing", "Digital Marketing", 
-                     "SEO/SEM", "Recruitment", "Training", "Benefits"],
-            "parents": ["", "TechCorp", "TechCorp", "TechCorp", "TechCorp",
-                       "Engineering", "Engineering", "Engineering", "Sales", "Sales",
-                       "Sales", "Marketing", "Marketing", "Marketing", "HR", "HR", "HR"],
-            "values": [500, 200, 150, 100, 50,
-                      80, 70, 50, 60, 50, 40, 40, 35, 25, 20, 20, 10],
-            "title": "Company Organizational Structure"
-        },
-        
-        "tech_stack": {
-            "names": ["Tech Stack", "Frontend", "Backend", "Database", "DevOps",
-                     "React", "Vue", "Angular", "Python", "Node.js", "Java",
-                     "PostgreSQL", "MongoDB", "Redis", "Docker", "Kubernetes", "AWS"],
-            "parents": ["", "Tech Stack", "Tech Stack", "Tech Stack", "Tech Stack",
-                       "Frontend", "Frontend", "Frontend", "Backend", "Backend", "Backend",
-                       "Database", "Database", "Database", "DevOps", "DevOps", "DevOps"],
-            "values": [1000, 300, 400, 200, 100,
-                      120, 100, 80, 180, 120, 100,
-                      80, 70, 50, 40, 35, 25],
-            "title": "Technology Stack Distribution"
-        },
-        
-        "sales_regions": {
-            "names": ["Global Sales", "North America", "Europe", "Asia Pacific",
-                     "USA", "Canada", "Mexico", "UK", "Germany", "France",
-                     "Japan", "China", "Australia", "India"],
-            "parents": ["", "Global Sales", "Global Sales", "Global Sales",
-                       "North America", "North America", "North America", 
-                       "Europe", "Europe", "Europe",
-                       "Asia Pacific", "Asia Pacific", "Asia Pacific", "Asia Pacific"],
-            "values": [10000, 4500, 3000, 2500,
-                      3000, 1000, 500, 1200, 800, 1000,
-                      800, 700, 500, 500],
-            "title": "Sales Performance by Region (in thousands)"
-        },
-        
-        "project_breakdown": {
-            "names": ["Software Project", "Development", "Testing", "Documentation", "Management",
-                     "Core Features", "UI/UX", "API", "Unit Tests", "Integration Tests", "E2E Tests",
-                     "User Manual", "API Docs", "Code Comments", "Planning", "Monitoring", "Reviews"],
-            "parents": ["", "Software Project", "Software Project", "Software Project", "Software Project",
-                       "Development", "Development", "Development", "Testing", "Testing", "Testing",
-                       "Documentation", "Documentation", "Documentation", "Management", "Management", "Management"],
-            "values": [800, 400, 200, 120, 80,
-                      200, 120, 80, 80, 70, 50,
-                      50, 40, 30, 30, 30, 20],
-            "title": "Software Project Time Allocation (hours)"
-        }
-    }
-    
-    # Get the selected dataset or default to company_structure
-    selected_data = datasets.get(data_type, datasets["company_structure"])
-    
-    # Create DataFrame
-    df = pd.DataFrame(selected_data)
-    
-    # Create sunburst chart
-    fig = px.sunburst(
-        df,
-        names='names',
-        parents='parents', 
-        values='values',
-        title=selected_data['title'],
-        color='values',
-        color_continuous_scale='Viridis',
-        hover_data={'values': ':,'}
-    )
-    
-    # Customize the layout
-    fig.update_layout(
-        font_size=12,
-        title_font_size=16,
-        margin=dict(t=50, l=25, r=25, b=25)
-    )
+    try:
+        counts = store.counts(by, *_parse_time_range(since, until))
+    except ValueError as e:
+        return {"status": "error", "message": str(e)}
+    return {"status": "success", "by": by, "counts": counts, "total": sum(counts.values())}
+
+@mcp.tool(name="get_log_histogram", description="Returns time-bucketed log record counts per level or source.")
+@instrumented(tool_metrics)
+def get_log_histogram(bucket_seconds: float = 60, by: str = "level", since: str | None = None,
+                      until: str | None = None):
+    """
+    Returns a time histogram in a columnar layout: "bucket_start" holds the bucket start
+    times ("YYYY-MM-DD HH:MM:SS") and "series" one count column per level or source.
+
+    Args:
+        bucket_seconds: Bucket width in seconds
+        by: "level" or "source"
+        since, until: Time range as "YYYY-MM-DD HH:MM:SS" (until is exclusive); defaults to the whole store
+    """
+    try:
+        starts, series = store.histogram(bucket_seconds, by, *_parse_time_range(since, until))
+    except ValueError as e:
+        return {"status": "error", "message": str(e)}
+    bucket_start = [datetime.fromtimestamp(t).strftime("%Y-%m-%d %H:%M:%S") for t in starts]
+    return {"status": "success", "by": by, "bucket_seconds": bucket_seconds,
+            "bucket_start": bucket_start, "series": series}
+
+@mcp.tool(name="get_top_messages", description="Returns the most frequent log messages.")
+@instrumented(tool_metrics)
+def get_top_messages(limit: int = 10, levels: list[str] | None = None):
+    """
+    Returns the most frequent (level, message) pairs since the store was created. Counts
+    come from a bounded Misra-Gries rollup; "approximate" is true once it has had to evict
+    rare messages, after which counts are lower bounds.
+    """
+    messages, approximate = store.top_messages(limit, levels)
+    return {"status": "success", "messages": messages, "approximate": approximate}
+
+@mcp.tool(name="generate_level_breakdown_chart", description="Generates a pie chart of log records per level, in one call.")
+@instrumented(tool_metrics)
+def generate_level_breakdown_chart(since: str | None = None, until: str | None = None, transport: str = "json"):
+    """
+    Counts records per level (see get_log_counts) and renders them with generate_pie_chart,
+    so the figure is built server-side without shipping any rows to the client.
+    """
+    try:
+        counts = store.counts("level", *_parse_time_range(since, until))
+    except ValueError as e:
+        return {"status": "error", "message": str(e)}
+    # Go through the chart cache but not the pie chart's own metrics
+    build_pie = generate_pie_chart.__wrapped__
+    result = build_pie(list(counts), [float(n) for n in counts.values()], "Log Levels", transport)
+    return {**result, "counts": counts}
+
+@mcp.tool(name="tail_logs", description="Streams log records appended after a cursor, optionally following for new ones.")
+@instrumented(tool_metrics)
+async def tail_logs(ctx: Context, cursor: int | None = None, limit: int = 500, follow: float = 0.0,
+                    levels: list[str] | None = None, skip_to_newest: bool = False):
+    """
+    Returns records with seq >= cursor in a columnar layout, oldest first.
+
+    Args:
+        cursor: "next_cursor" from the previous call; omit to start from the newest `limit` records
+        limit: Maximum number of records to return, 1 to LOG_TABLE_MAX_LIMIT
+        follow: Keep the call open for up to this many seconds (capped at TAIL_MAX_FOLLOW)
+                waiting for new records. Each batch that arrives is pushed immediately as an
+                MCP progress notification (progress = next cursor, message = JSON
+                {"next_cursor", "columns"}); the final result contains every record sent during the call.
+        levels: Only include records with these levels
+        skip_to_newest: If more than `limit` records are past the cursor, jump to the newest
+                        `limit` of them instead of paging through the backlog; "skipped" in
+                        the result counts the records passed over
+    """
+    if not 1 <= limit <= LOG_TABLE_MAX_LIMIT:
+        return {"status": "error", "message": f"limit must be between 1 and {LOG_TABLE_MAX_LIMIT}"}
+    follow = min(max(follow, 0.0), TAIL_MAX_FOLLOW)
+    skipped = 0
+    if cursor is None:
+        cursor = max(0, len(store) - limit)
+    elif skip_to_newest and len(store) - cursor > limit:
+        skipped = len(store) - limit - max(cursor, store.seq_range()[0])
+        cursor = len(store) - limit
+    deadline = asyncio.get_running_loop().time() + follow
+    records: list[dict] = []
+
+    while True:
+        # Reads may decompress a cold segment; keep them off the event loop
+        batch, cursor = await asyncio.to_thread(store.read_from, cursor, limit - len(records), levels)
+        if batch:
+            records.extend(batch)
+            if follow > 0:
+                columns = {name: [r[name] for r in batch] for name in LOG_COLUMNS}
+                await ctx.report_progress(cursor, message=json.dumps({"next_cursor": cursor, "columns": columns}))
+        if len(records) >= limit or asyncio.get_running_loop().time() >= deadline:
+            break
+        await asyncio.sleep(TAIL_POLL_INTERVAL)
+
+    columns = {name: [r[name] for r in records] for name in LOG_COLUMNS}
+    return {"status": "success", "next_cursor": cursor, "columns": columns, "skipped": max(skipped, 0)}
+
+@mcp.tool(name="generate_pie_chart", description="Generates a Plotly pie chart.", **PURE_TOOL_HINTS)
+@instrumented(tool_metrics)
+@cached(chart_cache)
+def generate_pie_chart(labels: list[str], values: list[float], title: str = "Pie Chart", transport: str = "json"):
+    """
+    Generates a Plotly pie chart and returns it serialized per chart_render.figure_payload (transport "json" or "typed").
+    """
+    return run_chart(chart_render.pie_chart, labels=labels, values=values, title=title, transport=transport)
+
+@mcp.tool(name="generate_sunburst_chart", description="Generates a Plotly sunburst chart for hierarchical data visualization.", **PURE_TOOL_HINTS)
+@instrumented(tool_metrics)
+@cached(chart_cache)
+def generate_sunburst_chart(data_type: str = "company_structure", transport: str = "json",
+                            ids: list[str] | None = None, parents: list[str | None] | None = None,
+                            values: list[float] | None = None, labels: list[str] | None = None,
+                            branchvalues: str = "remainder", table: dict[str, list] | None = None,
+                            path: list[str] | None = None, value_column: str | None = None,
+                            title: str | None = None, max_depth: int | None = None,
+                            min_fraction: float = 0.0, max_nodes: int | None = chart_render.SUNBURST_MAX_NODES):
+    """
+    Generates a Plotly sunburst chart from a built-in dataset or user-supplied hierarchical data.
     
-    return {"status": "success", "chart_json": fig.to_json(), "data_type": data_type}
+    Args:
+        data_type: Built-in dataset to visualize when no data is given ("company_structure", "tech_stack", "sales_regions", "project_breakdown")
+        transport: "json" for a chart_json string, "typed" for a chart_spec object with typed arrays
+        ids, parents, values, labels: Plotly-style node arrays; an empty parent marks a root
+        branchvalues: "remainder" if a node's value excludes its children, "total" if it includes them
+        table, path, value_column: Alternatively a columnar table with one row per leaf, the
+                                   columns forming the path from the root, and an optional value column
+        title: Chart title for user-supplied data
+        max_depth: Only draw this many rings
+        min_fraction: Merge subtrees smaller than this fraction of the total into an "Other" wedge
+        max_nodes: Upper bound on drawn wedges; smaller subtrees are merged beyond it
+    """
+    return run_chart(chart_render.sunburst_chart, data_type=data_type, transport=transport, ids=ids,
+                     parents=parents, values=values, labels=labels, branchvalues=branchvalues, table=table,
+                     path=path, value_column=value_column, title=title, max_depth=max_depth,
+                     min_fraction=min_fraction, max_nodes=max_nodes)
+
+@mcp.tool(name="get_cache_stats", description="Returns hit/miss counters for the chart result cache.")
+@instrumented(tool_metrics)
+def get_cache_stats(clear: bool = False):
+    """
+    Reports chart cache statistics; clear=True also empties the cache.
+    """
+    stats = chart_cache.stats()
+    if clear:
+        chart_cache.clear()
+    return {"status": "success", **stats}
 
-@mcp.tool(name="generate_mermaid_diagram", description="Generates a Mermaid diagram for various types of visualizations.")
+@mcp.tool(name="generate_mermaid_diagram", description="Generates a Mermaid diagram for various types of visualizations.", **PURE_TOOL_HINTS)
+@instrumented(tool_metrics)
 def generate_mermaid_diagram(diagram_type: str = "flowchart", content: str = ""):
     """
     Generates a Mermaid diagram based on type and content.
@@ -229,4 +627,76 @@ mindmap
         "message": f"Generated {diagram_type} diagram successfully"
     }
 
+# Server-side Mermaid -> SVG rendering with a local mermaid-cli; SVGs are cached by source md5
+mermaid_renderer = MermaidRenderer(
+    cache_dir=os.environ.get("MERMAID_SVG_CACHE_DIR", "mermaid_svg_cache"),
+    mmdc=os.environ.get("MERMAID_CLI"),
+    extra_args=os.environ.get("MERMAID_CLI_ARGS", ""),
+)
+
+@mcp.tool(name="render_mermaid_svg", description="Renders Mermaid source to SVG on the server (cached by content).", **PURE_TOOL_HINTS)
+@instrumented(tool_metrics)
+def render_mermaid_svg(mermaid_code: str):
+    """
+    Renders a Mermaid diagram to an SVG string with the server's vendored mermaid-cli.
+    Each distinct source is rendered once; repeat requests are served from the
+    content-addressed SVG store ("cached": true).
+    """
+    try:
+        svg, digest, was_cached = mermaid_renderer.render(mermaid_code)
+    except MermaidRenderError as e:
+        return {"status": "error", "message": str(e)}
+    return {"status": "success", "svg": svg, "digest": digest, "cached": was_cached}
+
+# Plotting stack warm-up: "eager" finishes before the server starts serving, "background"
+# warms in a thread after startup, "off" leaves the cost to the first chart request
+CHART_WARMUP = os.environ.get("CHART_WARMUP", "background")
+startup_report = {"warmup_mode": CHART_WARMUP, "warmup_state": "pending", "steps": {}}
+
+def warm_plotting_stack():
+    """
+    Imports numpy/plotly and renders throwaway charts (bypassing cache and metrics) so
+    templates, validators and the JSON encoder are loaded before the first real request.
+    Per-step timings land in startup_report.
+    """
+    steps = [
+        ("render pie chart", lambda: inspect.unwrap(generate_pie_chart)(["a", "b"], [1.0, 2.0])),
+        ("render sunburst chart", lambda: inspect.unwrap(generate_sunburst_chart)()),
+    ]
+    if CHART_WORKERS == 0:
+        # Charts render in this process, so load the stack here too; with workers, the
+        # renders above start the pool, whose workers warm themselves on startup
+        steps[:0] = [
+            ("import sunburst_data", lambda: importlib.import_module("sunburst_data")),
+            ("import plotly.graph_objects", lambda: importlib.import_module("plotly.graph_objects")),
+            ("load default template", lambda: importlib.import_module("plotly.io").templates[
+                importlib.import_module("plotly.io").templates.default]),
+        ]
+    startup_report["warmup_state"] = "running"
+    started = time.perf_counter()
+    try:
+        for name, step in steps:
+            step_started = time.perf_counter()
+            step()
+            startup_report["steps"][name] = round(time.perf_counter() - step_started, 4)
+    except Exception as e:
+        startup_report["warmup_state"] = f"failed: {e}"
+        logging.exception("Plotting stack warm-up failed")
+        return
+    startup_report["warmup_seconds"] = round(time.perf_counter() - started, 4)
+    startup_report["warmup_state"] = "done"
+    logging.info(f"Plotting stack warmed in {startup_report['warmup_seconds']}s")
+
+@mcp.tool(name="get_startup_report", description="Returns cold-start timings: server import time and plotting warm-up steps.")
+@instrumented(tool_metrics)
+def get_startup_report():
+    """
+    Reports how long the server module took to import and how long each warm-up step took.
+    """
+    return {"status": "success", **startup_report}
 
+startup_report["server_import_seconds"] = round(time.perf_counter() - _import_started, 4)
+if CHART_WARMUP == "eager":
+    warm_plotting_stack()
+elif CHART_WARMUP == "background":
+    threading.Thread(target=warm_plotting_stack, name="plotting-warmup", daemon=True).start()
@@ -0,0 +1,108 @@
+import hashlib
+import os
+import shlex
+import shutil
+import subprocess
+import tempfile
+import threading
+
+from result_cache import ResultCache
+
+# mermaid-cli vendored next to the app: npm install --prefix vendor @mermaid-js/mermaid-cli
+VENDORED_MMDC = os.path.join(os.path.dirname(os.path.abspath(__file__)), "vendor", "node_modules", ".bin", "mmdc")
+# A render that takes longer than this is treated as failed
+RENDER_TIMEOUT = 30.0 # seconds
+
+
+class MermaidRenderError(RuntimeError):
+    pass
+
+
+def source_digest(mermaid_code: str) -> str:
+    """
+    Content address of a diagram: the md5 of its source, as used for the receiver's element ids.
+    """
+    return hashlib.md5(mermaid_code.encode()).hexdigest()
+
+
+class MermaidRenderer:
+    """
+    Renders Mermaid source to SVG with a local mermaid-cli (mmdc) and keeps the
+    result in a content-addressed store on disk (<cache_dir>/<md5[:2]>/<md5>.svg)
+    fronted by an in-memory LRU, so each distinct diagram is rendered once.
+    Concurrent requests for the same diagram wait for a single render.
+    """
+
+    def __init__(self, cache_dir: str, mmdc: str | None = None, extra_args: str = "",
+                 memory_entries: int = 128, timeout: float = RENDER_TIMEOUT):
+        self.cache_dir = cache_dir
+        self.mmdc = mmdc or (VENDORED_MMDC if os.path.exists(VENDORED_MMDC) else shutil.which("mmdc"))
+        self.extra_args = shlex.split(extra_args)
+        self.timeout = timeout
+        self.renders = 0
+        self._memory = ResultCache(max_entries=memory_entries, ttl=None)
+        self._lock = threading.Lock()
+        self._inflight: dict[str, threading.Lock] = {}
+
+    def available(self) -> bool:
+        return bool(self.mmdc) and os.path.exists(self.mmdc)
+
+    def _path(self, digest: str) -> str:
+        return os.path.join(self.cache_dir, digest[:2], f"{digest}.svg")
+
+    def render(self, mermaid_code: str) -> tuple[str, str, bool]:
+        """
+        Returns (svg, digest, cached). Raises MermaidRenderError if the renderer is
+        missing or rejects the diagram.
+        """
+        digest = source_digest(mermaid_code)
+        svg = self._memory.get(digest)
+        if svg is not None:
+            return svg, digest, True
+
+        with self._lock:
+            key_lock = self._inflight.setdefault(digest, threading.Lock())
+        with key_lock:
+            try:
+                path = self._path(digest)
+                if os.path.exists(path):
+                    with open(path, encoding="utf-8") as f:
+                        svg = f.read()
+                    cached = True
+                else:
+                    svg = self._run_mmdc(mermaid_code)
+                    os.makedirs(os.path.dirname(path), exist_ok=True)
+                    # Write then rename, so readers never see a partial file
+                    tmp_path = f"{path}.{threading.get_ident()}.tmp"
+                    with open(tmp_path, "w", encoding="utf-8") as f:
+                        f.write(svg)
+                    os.replace(tmp_path, path)
+                    cached = False
+                self._memory.put(digest, svg)
+            finally:
+                with self._lock:
+                    self._inflight.pop(digest, None)
+        return svg, digest, cached
+
+    def _run_mmdc(self, mermaid_code: str) -> str:
+        if not self.available():
+            raise MermaidRenderError("Mermaid renderer (mmdc) not found; install it under vendor/ or set MERMAID_CLI")
+        with tempfile.TemporaryDirectory(prefix="mermaid-") as work_dir:
+            source_path = os.path.join(work_dir, "diagram.mmd")
+            svg_path = os.path.join(work_dir, "diagram.svg")
+            with open(source_path, "w", encoding="utf-8") as f:
+                f.write(mermaid_code)
+            command = [self.mmdc, "-i", source_path, "-o", svg_path, "-b", "white", "-q", *self.extra_args]
+            try:
+                completed = subprocess.run(command, capture_output=True, text=True, timeout=self.timeout)
+            except subprocess.TimeoutExpired:
+                raise MermaidRenderError(f"Mermaid render timed out after {self.timeout}s")
+            if completed.returncode != 0 or not os.path.exists(svg_path):
+                raise MermaidRenderError(f"Mermaid render failed: {(completed.stderr or completed.stdout).strip()[:500]}")
+            self.renders += 1
+            with open(svg_path, encoding="utf-8") as f:
+                return f.read()
+
+    def stats(self) -> dict:
+        return {"renderer": self.mmdc, "available": self.available(), "renders": self.renders,
+                "memory_cache": self._memory.stats()}
@@ -0,0 +1,144 @@
+import functools
+import hashlib
+import inspect
+import json
+import threading
+import time
+from collections import OrderedDict
+
+
+class ResultCache:
+    """
+    Thread-safe LRU cache with a time-to-live (per cache, or per entry) and hit/miss counters.
+    With max_bytes set, values are also bounded by their total JSON size: the least
+    recently used are evicted to stay within it, and a value larger than the whole
+    budget is not stored.
+    """
+
+    def __init__(self, max_entries: int = 256, ttl: float | None = 3600.0, max_bytes: int | None = None):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._entries: OrderedDict[str, tuple[float | None, object, int]] = OrderedDict() # key -> (expires_at, value, bytes)
+        self._bytes = 0
+        self._functions = {} # name -> @cached wrapper memoized in this cache
+
+    @staticmethod
+    def make_key(name: str, arguments: dict) -> str:
+        """
+        Canonical key for a call: argument order and dict key order do not matter, and
+        integral floats match their ints (1.0 and 1 arrive alike once validated). The
+        canonical JSON is hashed, so large arguments do not make large keys.
+        """
+        canonical = json.dumps([name, _canonical(arguments)], sort_keys=True, separators=(",", ":"), default=str)
+        return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+    def get(self, key: str):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and (entry[0] is None or time.monotonic() < entry[0]):
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            if entry is not None:
+                self._remove(key)
+            self.misses += 1
+            return None
+
+    def has_call(self, name: str, arguments: dict) -> bool:
+        """
+        Whether calling the function memoized here as name with these arguments would
+        be answered from the cache. Does not count as a lookup or refresh the entry.
+        """
+        fn = self._functions.get(name)
+        if fn is None:
+            return False
+        try:
+            key = fn.cache_key(arguments)
+        except TypeError:
+            return False # Arguments the function would reject
+        with self._lock:
+            entry = self._entries.get(key)
+            return entry is not None and (entry[0] is None or time.monotonic() < entry[0])
+
+    def put(self, key: str, value, ttl: float | None = None):
+        """
+        Stores value; ttl overrides the cache-wide time-to-live for this entry.
+        """
+        ttl = self.ttl if ttl is None else ttl
+        size = len(json.dumps(value, separators=(",", ":"), default=str)) if self.max_bytes is not None else 0
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            if self.max_bytes is not None and size > self.max_bytes:
+                return value
+            self._entries[key] = (None if ttl is None else time.monotonic() + ttl, value, size)
+            self._bytes += size
+            while len(self._entries) > self.max_entries or (self.max_bytes is not None and self._bytes > self.max_bytes):
+                self._remove(next(iter(self._entries)))
+        return value
+
+    def _remove(self, key: str):
+        self._bytes -= self._entries.pop(key)[2]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "size": len(self._entries),
+                "max_entries": self.max_entries,
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "ttl": self.ttl,
+            }
+
+
+def _canonical(value):
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    if isinstance(value, dict):
+        return {k: _canonical(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_canonical(v) for v in value]
+    return value
+
+
+def cached(cache: ResultCache):
+    """
+    Memoizes a deterministic function in cache, keyed on its bound arguments
+    (defaults applied). Only results with status "success" are stored.
+    """
+    def decorator(fn):
+        signature = inspect.signature(fn)
+
+        def key_for(*args, **kwargs):
+            bound = signature.bind(*args, **kwargs)
+            bound.apply_defaults()
+            return cache.make_key(fn.__name__, bound.arguments)
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            key = key_for(*args, **kwargs)
+            result = cache.get(key)
+            if result is None:
+                result = fn(*args, **kwargs)
+                if isinstance(result, dict) and result.get("status") == "success":
+                    cache.put(key, result)
+            return result
+
+        wrapper.cache_key = lambda arguments: key_for(**arguments)
+        cache._functions[fn.__name__] = wrapper
+        return wrapper
+
+    return decorator
@@ -0,0 +1,43 @@
+"""
+Production entry point for logging_mcp_server.py.
+
+Runs the server over streamable HTTP with CPU-bound chart tools offloaded to a pool of
+worker processes, while log ingestion stays in the single server process that owns the
+log store and log sink:
+
+    python run_logging_server.py --host 0.0.0.0 --port 8000 --chart-workers 4
+
+The server module is imported only inside main(): chart workers are spawned and
+re-import this script, and must not open the log store themselves.
+"""
+import argparse
+import os
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the logging MCP server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--transport", default="http", choices=["http", "stdio"])
+    parser.add_argument("--chart-workers", type=int, default=os.cpu_count() or 1,
+                        help="Worker processes for chart rendering (0 renders in the server process)")
+    parser.add_argument("--chart-warmup", default="eager", choices=["eager", "background", "off"],
+                        help="Warm the chart workers before serving, in the background, or not at all")
+    parser.add_argument("--log-store-dir", default=os.environ.get("LOG_STORE_DIR", "log_store"))
+    args = parser.parse_args()
+
+    # The server reads its configuration from the environment at import time
+    os.environ["CHART_WORKERS"] = str(args.chart_workers)
+    os.environ["CHART_WARMUP"] = args.chart_warmup
+    os.environ["LOG_STORE_DIR"] = args.log_store_dir
+
+    import logging_mcp_server
+
+    if args.transport == "stdio":
+        logging_mcp_server.mcp.run(transport="stdio")
+    else:
+        logging_mcp_server.mcp.run(transport="http", host=args.host, port=args.port)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,181 @@
+import bisect
+import functools
+import inspect
+import threading
+import time
+
+from fastmcp.server.middleware import Middleware
+
+# Histogram bucket upper bounds (Prometheus "le" values); +Inf is implicit
+SECONDS_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+BYTES_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+
+class Histogram:
+    """
+    Fixed-bucket histogram; observe() is a bisect plus two additions.
+    """
+    __slots__ = ("bounds", "counts", "total", "count")
+
+    def __init__(self, bounds: tuple):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect.bisect_left(self.bounds, value)] += 1
+        self.total += value
+        self.count += 1
+
+    def snapshot(self) -> dict:
+        cumulative = 0
+        buckets = {}
+        for bound, n in zip(list(self.bounds) + ["+Inf"], self.counts):
+            cumulative += n
+            buckets[str(bound)] = cumulative
+        return {"count": self.count, "sum": round(self.total, 6), "buckets": buckets}
+
+
+class _ToolStats:
+    __slots__ = ("calls", "errors", "wall", "cpu", "response_bytes")
+
+    def __init__(self):
+        self.calls = 0
+        self.errors = 0
+        self.wall = Histogram(SECONDS_BUCKETS)
+        self.cpu = Histogram(SECONDS_BUCKETS)
+        self.response_bytes = Histogram(BYTES_BUCKETS)
+
+
+class ToolMetrics:
+    """
+    Per-tool call counts, error counts and wall time / CPU time / response size histograms.
+    """
+
+    def __init__(self):
+        self.started_at = time.time()
+        self._lock = threading.Lock()
+        self._tools: dict[str, _ToolStats] = {}
+
+    def _stats(self, tool: str) -> _ToolStats:
+        stats = self._tools.get(tool)
+        if stats is None:
+            stats = self._tools[tool] = _ToolStats()
+        return stats
+
+    def record_call(self, tool: str, wall: float, cpu: float, error: bool):
+        with self._lock:
+            stats = self._stats(tool)
+            stats.calls += 1
+            stats.errors += error
+            stats.wall.observe(wall)
+            stats.cpu.observe(cpu)
+
+    def record_response(self, tool: str, size: int):
+        with self._lock:
+            self._stats(tool).response_bytes.observe(size)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "uptime_seconds": round(time.time() - self.started_at, 3),
+                "tools": {
+                    name: {
+                        "calls": s.calls,
+                        "errors": s.errors,
+                        "wall_seconds": s.wall.snapshot(),
+                        "cpu_seconds": s.cpu.snapshot(),
+                        "response_bytes": s.response_bytes.snapshot(),
+                    }
+                    for name, s in sorted(self._tools.items())
+                },
+            }
+
+    def prometheus(self) -> str:
+        """
+        Renders the metrics in the Prometheus text exposition format.
+        """
+        snapshot = self.snapshot()
+        lines = [
+            "# HELP mcp_tool_calls_total Tool calls.",
+            "# TYPE mcp_tool_calls_total counter",
+        ]
+        for name, s in snapshot["tools"].items():
+            lines.append(f'mcp_tool_calls_total{{tool="{name}"}} {s["calls"]}')
+        lines += ["# HELP mcp_tool_errors_total Tool calls that raised or returned status=error.",
+                  "# TYPE mcp_tool_errors_total counter"]
+        for name, s in snapshot["tools"].items():
+            lines.append(f'mcp_tool_errors_total{{tool="{name}"}} {s["errors"]}')
+        for metric, key, help_text in (
+            ("mcp_tool_wall_seconds", "wall_seconds", "Tool wall-clock time."),
+            ("mcp_tool_cpu_seconds", "cpu_seconds", "Tool CPU time on the executing thread."),
+            ("mcp_tool_response_bytes", "response_bytes", "Serialized tool response size."),
+        ):
+            lines += [f"# HELP {metric} {help_text}", f"# TYPE {metric} histogram"]
+            for name, s in snapshot["tools"].items():
+                histogram = s[key]
+                for bound, cumulative in histogram["buckets"].items():
+                    lines.append(f'{metric}_bucket{{tool="{name}",le="{bound}"}} {cumulative}')
+                lines.append(f'{metric}_sum{{tool="{name}"}} {histogram["sum"]}')
+                lines.append(f'{metric}_count{{tool="{name}"}} {histogram["count"]}')
+        return "\n".join(lines) + "\n"
+
+
+def _is_error(result) -> bool:
+    return isinstance(result, dict) and result.get("status") == "error"
+
+
+def instrumented(metrics: ToolMetrics, name: str | None = None):
+    """
+    Records call count, errors, wall time and CPU time of a tool function. Sync tools
+    run on one worker thread, so their CPU time is exact; for async tools it is the
+    event-loop thread's CPU time across the call and includes interleaved work.
+    """
+    def decorator(fn):
+        tool = name or fn.__name__
+
+        if inspect.iscoroutinefunction(fn):
+            @functools.wraps(fn)
+            async def async_wrapper(*args, **kwargs):
+                wall, cpu = time.perf_counter(), time.thread_time()
+                error = True
+                try:
+                    result = await fn(*args, **kwargs)
+                    error = _is_error(result)
+                    return result
+                finally:
+                    metrics.record_call(tool, time.perf_counter() - wall, time.thread_time() - cpu, error)
+
+            return async_wrapper
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            wall, cpu = time.perf_counter(), time.thread_time()
+            error = True
+            try:
+                result = fn(*args, **kwargs)
+                error = _is_error(result)
+                return result
+            finally:
+                metrics.record_call(tool, time.perf_counter() - wall, time.thread_time() - cpu, error)
+
+        return wrapper
+
+    return decorator
+
+
+class ResponseSizeMiddleware(Middleware):
+    """
+    Records the size of each tool response from the text content FastMCP has already
+    serialized, so measuring it costs no extra encoding.
+    """
+
+    def __init__(self, metrics: ToolMetrics):
+        self.metrics = metrics
+
+    async def on_call_tool(self, context, call_next):
+        result = await call_next(context)
+        size = sum(len(getattr(block, "text", "") or "") for block in result.content or ())
+        self.metrics.record_response(context.message.name, size)
+        return result
@@ -3,22 +3,187 @@ from datetime import datetime
 import time
 import subprocess
 import concurrent.futures
+import itertools
+import json
+import os
+import threading
+import uuid
+from collections import OrderedDict, deque
 import requests
+from requests.adapters import HTTPAdapter
+from streamlit import runtime
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+from urllib3.util.retry import Retry
+
+# Local log display keeps at most this many entries (oldest dropped first), shown a page at a time
+LOG_DISPLAY_MAX_ENTRIES = 5000
+LOG_DISPLAY_PAGE_SIZE = 50
+LEVEL_EMOJI = {"info": "ℹ️", "warning": "⚠️", "error": "❌"}
 
 # Initialize session state
 if 'logs' not in st.session_state:
-    st.session_state.logs = []
+    st.session_state.logs = deque(maxlen=LOG_DISPLAY_MAX_ENTRIES)
+    # Markdown for each entry, rendered once when the entry is added
+    st.session_state.rendered_logs = deque(maxlen=LOG_DISPLAY_MAX_ENTRIES)
+
+def render_log_entry(log: dict) -> str:
+    return f"{LEVEL_EMOJI.get(log['level'], '📝')} **[{log['timestamp']}]** `{log['source']}`: {log['message']}"
 
 st.title("Checkpoint Logger")
 
-# Initialize ThreadPoolExecutor in session state for git commands and file reading
-if 'executor' not in st.session_state:
-    st.session_state.executor = concurrent.futures.ThreadPoolExecutor(max_workers=3) # Increased max_workers for 2 file reads + git
+# --- Shared Worker Pool ---
+WORKER_POOL_MAX_WORKERS = 4
+WORKER_POOL_MAX_PENDING = 64 # queued + running tasks across all sessions
+WORKER_POOL_SESSION_QUOTA = 4 # queued + running tasks per browser session
+WORKER_POOL_REAP_INTERVAL = 30.0 # seconds between sweeps for ended sessions
+
+class PoolBusyError(RuntimeError):
+    """Raised when the worker pool or a session's quota is full."""
+
+class WorkerPool:
+    """
+    One bounded thread pool shared by every browser session. Submissions are refused
+    with PoolBusyError once the pool or the submitting session is at its limit, and
+    queued work of sessions that have ended is cancelled by a periodic sweep.
+    metrics() reports queue depth and recent queue-wait / run-time percentiles.
+    """
+    def __init__(self, max_workers: int = WORKER_POOL_MAX_WORKERS, max_pending: int = WORKER_POOL_MAX_PENDING,
+                 session_quota: int = WORKER_POOL_SESSION_QUOTA):
+        self.max_pending = max_pending
+        self.session_quota = session_quota
+        self._executor = concurrent.futures.ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="worker-pool")
+        self._lock = threading.Lock()
+        self._by_session = {} # session_id -> set of outstanding futures
+        self._pending = 0
+        self._running = 0
+        self._completed = 0
+        self._rejected = 0
+        self._cancelled = 0
+        self._wait_times = deque(maxlen=1000)
+        self._run_times = deque(maxlen=1000)
+        self._reaper = threading.Thread(target=self._reap_loop, name="worker-pool-reaper", daemon=True)
+        self._reaper.start()
+
+    def submit(self, fn, *args, session_id: str | None = None):
+        """
+        Queues fn(*args). Tasks with a session_id count against that session's quota;
+        process-wide work (session_id=None) only counts against the pool limit.
+        """
+        with self._lock:
+            outstanding = self._by_session.get(session_id, ())
+            if self._pending >= self.max_pending or (session_id is not None and len(outstanding) >= self.session_quota):
+                self._rejected += 1
+                raise PoolBusyError("Worker pool is busy, try again shortly")
+            self._pending += 1
+            submitted = time.monotonic()
+            future = self._executor.submit(self._run, fn, args, submitted)
+            if session_id is not None:
+                self._by_session.setdefault(session_id, set()).add(future)
+        future.add_done_callback(lambda f: self._done(f, session_id))
+        return future
+
+    def submit_for_session(self, fn, *args):
+        """
+        Submits on behalf of the browser session running the current script.
+        """
+        ctx = get_script_run_ctx()
+        return self.submit(fn, *args, session_id=ctx.session_id if ctx else None)
+
+    def _run(self, fn, args, submitted):
+        started = time.monotonic()
+        with self._lock:
+            self._running += 1
+            self._wait_times.append(started - submitted)
+        try:
+            return fn(*args)
+        finally:
+            with self._lock:
+                self._running -= 1
+                self._run_times.append(time.monotonic() - started)
+
+    def _done(self, future, session_id):
+        with self._lock:
+            self._pending -= 1
+            if future.cancelled():
+                self._cancelled += 1
+            else:
+                self._completed += 1
+            outstanding = self._by_session.get(session_id)
+            if outstanding is not None:
+                outstanding.discard(future)
+                if not outstanding:
+                    del self._by_session[session_id]
+
+    def _reap_loop(self):
+        while True:
+            time.sleep(WORKER_POOL_REAP_INTERVAL)
+            if not runtime.exists():
+                continue
+            instance = runtime.get_instance()
+            with self._lock:
+                ended = [(sid, list(futures)) for sid, futures in self._by_session.items()
+                         if not instance.is_active_session(sid)]
+            for _, futures in ended:
+                for future in futures:
+                    future.cancel() # Only succeeds for work that has not started yet
+
+    def metrics(self) -> dict:
+        def percentiles(samples):
+            if not samples:
+                return {"p50": None, "p95": None}
+            ordered = sorted(samples)
+            return {
+                "p50": round(ordered[len(ordered) // 2], 4),
+                "p95": round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))], 4),
+            }
+
+        with self._lock:
+            return {
+                "queue_depth": self._pending - self._running,
+                "running": self._running,
+                "completed": self._completed,
+                "rejected": self._rejected,
+                "cancelled": self._cancelled,
+                "sessions": len(self._by_session),
+                "queue_wait_seconds": percentiles(self._wait_times),
+                "run_seconds": percentiles(self._run_times),
+            }
+
+@st.cache_resource
+def get_worker_pool():
+    return WorkerPool()
 
 # Function to run git command
 def run_git_command(command):
     return subprocess.check_output(command, cwd=".").decode("utf-8")
 
+# Function to run a git command, keeping at most max_bytes of its output
+def run_git_command_capped(command, max_bytes):
+    """
+    Streams the command's output in chunks and stops reading (killing git) once
+    max_bytes have arrived, so huge outputs never sit in memory whole.
+    Returns (text, truncated).
+    """
+    chunks = []
+    received = 0
+    truncated = False
+    with subprocess.Popen(command, cwd=".", stdout=subprocess.PIPE, stderr=subprocess.PIPE) as proc:
+        while True:
+            chunk = proc.stdout.read(64 * 1024)
+            if not chunk:
+                break
+            chunks.append(chunk)
+            received += len(chunk)
+            if received >= max_bytes:
+                truncated = True
+                proc.kill()
+                break
+        stderr = proc.stderr.read()
+        returncode = proc.wait()
+    if returncode and not truncated:
+        raise subprocess.CalledProcessError(returncode, command, stderr=stderr)
+    return b"".join(chunks)[:max_bytes].decode("utf-8", errors="replace"), truncated
+
 # Function to read file content
 def read_file_content(filepath):
     try:
@@ -27,32 +192,461 @@ def read_file_content(filepath):
     except Exception as e:
         return f"# Error reading file {filepath}: {e}"
 
+# --- Git Snapshots ---
+# Recompute git output at most this often, however fast the working tree changes
+GIT_SNAPSHOT_MIN_INTERVAL = 2.0 # seconds
+GIT_PANEL_REFRESH_SECONDS = 2
+# Output caps: git status as a whole, each file's diff, and how many changed files are listed
+GIT_STATUS_MAX_BYTES = 64 * 1024
+GIT_FILE_DIFF_MAX_BYTES = 256 * 1024
+GIT_DIFF_MAX_FILES = 200
+GIT_FILE_DIFF_CACHE_SIZE = 64
+# Without a file watcher, working-tree edits are picked up by refreshing at least this often
+GIT_SNAPSHOT_FALLBACK_TTL = 10.0 # seconds
+# Paths whose gitignore status the watcher remembers
+GIT_IGNORE_CACHE_SIZE = 4096
+
+class GitSnapshotService:
+    """
+    Process-wide cache of `git status` / `git diff` output shared by every session.
+    A snapshot is keyed on HEAD, the index mtime and a generation counter bumped by a
+    working-tree file watcher (changes to gitignored paths are skipped), and is
+    recomputed in the background only when that key changes. Without watchdog the
+    generation advances every GIT_SNAPSHOT_FALLBACK_TTL seconds instead. Readers never
+    wait: they get the latest completed snapshot. Outside a git repository the service
+    holds a single snapshot carrying the error and never runs git again.
+    """
+    def __init__(self, pool: WorkerPool, repo_dir: str = "."):
+        self.pool = pool
+        self.repo_dir = os.path.abspath(repo_dir)
+        self._lock = threading.Lock()
+        self._generation = 0
+        self._snapshot = None
+        try:
+            self.git_dir = os.path.join(self.repo_dir, run_git_command(["git", "rev-parse", "--git-dir"]).strip())
+        except (subprocess.CalledProcessError, OSError) as e:
+            self.git_dir = None
+            self._snapshot = {"key": None, "taken_at": datetime.now().strftime("%H:%M:%S"),
+                              "status_error": str(e), "diff_error": str(e)}
+        self._pending_key = None
+        self._last_started = 0.0
+        self._file_diffs = OrderedDict() # (snapshot key, path) -> (text, truncated)
+        self._diff_loads = {} # (snapshot key, path) -> future of a diff being fetched
+        self._ignored = {} # path -> whether git ignores it
+        self._observer = self._start_watcher() if self.git_dir else None
+
+    def _start_watcher(self):
+        try:
+            from watchdog.events import FileSystemEventHandler
+            from watchdog.observers import Observer
+        except ImportError:
+            return None # Fall back to the HEAD/index key plus a TTL
+
+        service = self
+        git_dir = self.git_dir + os.sep
+        WATCHED_EVENTS = ("created", "deleted", "modified", "moved")
+
+        class WorkingTreeHandler(FileSystemEventHandler):
+            def on_any_event(self, event):
+                # Reads (opened/closed, which git itself causes) and directory mtime bumps change nothing
+                if event.event_type not in WATCHED_EVENTS or (event.is_directory and event.event_type == "modified"):
+                    return
+                paths = [p for p in (event.src_path, getattr(event, "dest_path", "")) if p]
+                if any(os.path.basename(p) == ".gitignore" for p in paths):
+                    with service._lock:
+                        service._ignored.clear()
+                # Changes inside .git are covered by the HEAD/index part of the key, and
+                # ignored paths (e.g. the log store) never show up in status or diff
+                if any(not p.startswith(git_dir) and not service._is_ignored(p) for p in paths):
+                    service.invalidate()
+
+        observer = Observer()
+        observer.schedule(WorkingTreeHandler(), self.repo_dir, recursive=True)
+        observer.daemon = True
+        observer.start()
+        return observer
+
+    def invalidate(self):
+        with self._lock:
+            self._generation += 1
+
+    def _is_ignored(self, path):
+        with self._lock:
+            ignored = self._ignored.get(path)
+        if ignored is None:
+            ignored = subprocess.run(["git", "check-ignore", "-q", path], cwd=self.repo_dir,
+                                     stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL).returncode == 0
+            with self._lock:
+                if len(self._ignored) >= GIT_IGNORE_CACHE_SIZE:
+                    self._ignored.clear()
+                self._ignored[path] = ignored
+        return ignored
+
+    def _key(self):
+        def mtime(path):
+            try:
+                return os.stat(path).st_mtime_ns
+            except OSError:
+                return None
+
+        try:
+            with open(os.path.join(self.git_dir, "HEAD")) as f:
+                head = f.read().strip()
+        except OSError:
+            head = None
+        ref_mtime = mtime(os.path.join(self.git_dir, head[5:])) if head and head.startswith("ref: ") else None
+        generation = self._generation
+        if self._observer is None:
+            generation = int(time.monotonic() // GIT_SNAPSHOT_FALLBACK_TTL)
+        return (head, ref_mtime, mtime(os.path.join(self.git_dir, "index")), generation)
+
+    def snapshot(self):
+        """
+        Returns the latest snapshot (None until the first one completes) and schedules a
+        background refresh if the repository changed since it was taken.
+        """
+        if self.git_dir is None:
+            return self._snapshot
+        key = self._key()
+        with self._lock:
+            current = self._snapshot
+            stale = current is None or current["key"] != key
+            if stale and self._pending_key is None and time.monotonic() - self._last_started >= GIT_SNAPSHOT_MIN_INTERVAL:
+                try:
+                    self.pool.submit(self._refresh, key)
+                except PoolBusyError:
+                    return current # Try again on the next read
+                self._pending_key = key
+                self._last_started = time.monotonic()
+            return current
+
+    def _refresh(self, key):
+        snapshot = {"key": key, "taken_at": datetime.now().strftime("%H:%M:%S")}
+        try:
+            # --no-optional-locks keeps `git status` from rewriting the index (and retriggering us)
+            snapshot["status"], snapshot["status_truncated"] = run_git_command_capped(
+                ["git", "--no-optional-locks", "status"], GIT_STATUS_MAX_BYTES)
+        except Exception as e:
+            snapshot["status_error"] = str(e)
+        try:
+            # Only the per-file summary is fetched up front; hunks are loaded by file_diff()
+            numstat = run_git_command(["git", "diff", "--numstat"])
+            snapshot["diff_files"] = [self._parse_numstat(line) for line in numstat.splitlines() if line]
+        except Exception as e:
+            snapshot["diff_error"] = str(e)
+        with self._lock:
+            self._snapshot = snapshot
+            self._pending_key = None
+            self._file_diffs.clear()
+            self._diff_loads.clear()
+
+    @staticmethod
+    def _parse_numstat(line):
+        added, deleted, path = line.split("\t", 2)
+        binary = added == "-"
+        return {"path": path, "added": 0 if binary else int(added), "deleted": 0 if binary else int(deleted), "binary": binary}
+
+    def file_diff(self, snapshot, path):
+        """
+        Returns (text, truncated) for one file's diff, capped at GIT_FILE_DIFF_MAX_BYTES
+        and cached for the lifetime of the snapshot, or None while it is still being
+        fetched. The fetch runs on the worker pool under the calling session's quota
+        (PoolBusyError if that is full); a failed fetch raises on the next call.
+        """
+        cache_key = (snapshot["key"], path)
+        with self._lock:
+            if cache_key in self._file_diffs:
+                self._file_diffs.move_to_end(cache_key)
+                return self._file_diffs[cache_key]
+            future = self._diff_loads.get(cache_key)
+            if future is None:
+                future = self._diff_loads[cache_key] = self.pool.submit_for_session(self._load_diff, cache_key)
+                future.add_done_callback(lambda f: self._forget_load(cache_key, f))
+                return None
+        if not future.done():
+            return None
+        with self._lock:
+            self._diff_loads.pop(cache_key, None)
+        return future.result()
+
+    def _load_diff(self, cache_key):
+        result = run_git_command_capped(["git", "diff", "--", cache_key[1]], GIT_FILE_DIFF_MAX_BYTES)
+        with self._lock:
+            self._file_diffs[cache_key] = result
+            while len(self._file_diffs) > GIT_FILE_DIFF_CACHE_SIZE:
+                self._file_diffs.popitem(last=False)
+        return result
+
+    def _forget_load(self, cache_key, future):
+        # Successful loads are served from _file_diffs; failures are kept until reported once
+        if future.cancelled() or future.exception() is None:
+            with self._lock:
+                if self._diff_loads.get(cache_key) is future:
+                    del self._diff_loads[cache_key]
+
+@st.cache_resource
+def get_git_snapshots():
+    return GitSnapshotService(get_worker_pool())
+
 # --- MCP Server Integration ---
 MCP_SERVER_URL = "http://localhost:8000/mcp/" # Default FastMCP RPC endpoint
+MCP_REQUEST_TIMEOUT = (3.05, 10) # (connect, read) seconds
 
-def send_log_to_mcp_server(message: str, level: str, source: str):
-    payload = {
-        "jsonrpc": "2.0",
-        "method": "log_message",
-        "params": {"message": f"From Streamlit ({source}): {message}", "level": level},
-        "id": 1 # A simple ID for the request
-    }
-    headers = {'Accept': 'application/json'}
+@st.cache_resource
+def get_http_session() -> requests.Session:
+    """
+    Process-wide HTTP session with a keep-alive connection pool. The transport only
+    retries (with exponential backoff) when the connection could not be made, i.e. the
+    request never reached the server; anything later is left to LogBuffer, whose
+    batch ids let the server drop a batch it already stored.
+    """
+    session = requests.Session()
+    retry = Retry(total=3, connect=3, read=0, status=0, other=0, backoff_factor=0.5, allowed_methods=None)
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=16, max_retries=retry)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+class MCPHttpSession:
+    """
+    Minimal streamable-HTTP MCP client over a pooled requests.Session: runs the
+    initialize handshake once, sends the server's mcp-session-id with every call and
+    re-initializes when the server no longer knows the session (e.g. it restarted).
+    """
+    HEADERS = {"Accept": "application/json, text/event-stream", "Content-Type": "application/json"}
+
+    def __init__(self, http: requests.Session, url: str = MCP_SERVER_URL):
+        self.http = http
+        self.url = url
+        self._lock = threading.Lock()
+        self._session_id = None
+        self._ids = itertools.count(1)
+
+    def _post(self, payload: dict) -> requests.Response:
+        headers = dict(self.HEADERS)
+        if self._session_id:
+            headers["mcp-session-id"] = self._session_id
+        return self.http.post(self.url, json=payload, headers=headers, timeout=MCP_REQUEST_TIMEOUT)
+
+    def _initialize(self):
+        response = self._post({"jsonrpc": "2.0", "id": next(self._ids), "method": "initialize", "params": {
+            "protocolVersion": "2025-06-18", "capabilities": {},
+            "clientInfo": {"name": "simple_logger", "version": "1"},
+        }})
+        response.raise_for_status()
+        self._session_id = response.headers.get("mcp-session-id")
+        self._post({"jsonrpc": "2.0", "method": "notifications/initialized"}).raise_for_status()
+
+    def call_tool(self, tool_name: str, arguments: dict) -> dict:
+        """
+        Sends a tools/call request and returns the decoded JSON-RPC response. Raises
+        requests exceptions for transport failures and ValueError for undecodable bodies.
+        """
+        with self._lock:
+            for attempt in range(2):
+                if self._session_id is None:
+                    self._initialize()
+                response = self._post({"jsonrpc": "2.0", "id": next(self._ids), "method": "tools/call",
+                                       "params": {"name": tool_name, "arguments": arguments}})
+                if response.status_code in (400, 404) and self._session_id and not attempt:
+                    self._session_id = None # unknown or expired session; handshake again
+                    continue
+                response.raise_for_status()
+                return _decode_rpc_body(response)
+
+def _decode_rpc_body(response: requests.Response) -> dict:
+    """
+    Decodes a JSON-RPC response sent either as plain JSON or as a single SSE event.
+    """
+    if response.headers.get("content-type", "").startswith("text/event-stream"):
+        data = [line[len("data:"):].strip() for line in response.text.splitlines() if line.startswith("data:")]
+        if not data:
+            raise ValueError("Empty event stream")
+        return json.loads(data[-1])
+    return response.json()
+
+@st.cache_resource
+def get_mcp_session() -> MCPHttpSession:
+    return MCPHttpSession(get_http_session())
+
+def call_mcp_tool(session: MCPHttpSession, tool_name: str, arguments: dict) -> dict:
+    """
+    Calls a tool on the MCP server and returns the decoded JSON-RPC response, whose
+    result.structuredContent holds the tool's result dict. Errors - transport, protocol
+    or the tool reporting status "error" - are returned as {"error": {...}} rather than
+    raised; when the server's scheduler defers the call, the error carries its
+    "retry_after" hint (seconds). Does not touch the Streamlit UI, so it is safe to
+    call from a background thread.
+    """
     try:
-        response = requests.post(MCP_SERVER_URL, json=payload, headers=headers)
-        response.raise_for_status() # Raise an HTTPError for bad responses (4xx or 5xx)
-        result = response.json()
-        if "result" in result:
-            st.success(f"MCP Server response: {result['result']['message']}")
-        elif "error" in result:
-            st.error(f"MCP Server error: {result['error']['message']}")
-        return result
+        decoded = session.call_tool(tool_name, arguments)
     except requests.exceptions.ConnectionError as e:
-        st.error(f"Could not connect to MCP server at {MCP_SERVER_URL}. Is it running? Error: {e}")
-        return {"error": {"message": f"Connection error: {e}"}}
+        return {"error": {"message": f"Could not connect to MCP server at {session.url}. Is it running? Error: {e}"}}
     except requests.exceptions.RequestException as e:
-        st.error(f"Error sending log to MCP server: {e}")
         return {"error": {"message": f"Request error: {e}"}}
+    except ValueError as e:
+        return {"error": {"message": f"Invalid JSON response: {e}"}}
+
+    if "error" in decoded:
+        return {"error": decoded["error"]}
+    result = decoded.get("result") or {}
+    structured = result.get("structuredContent") or {}
+    if result.get("isError") or structured.get("status") == "error":
+        text = next((block.get("text") for block in result.get("content", []) if block.get("text")), None)
+        error = {"message": structured.get("message") or text or "Tool call failed"}
+        if isinstance(structured.get("retry_after"), (int, float)):
+            error["retry_after"] = float(structured["retry_after"])
+        return {"error": error}
+    return decoded
+
+def send_logs_to_mcp_server(session: MCPHttpSession, records: list[dict], batch_id: str | None = None):
+    """
+    Sends a batch of log records to the MCP server's log_messages tool in one request.
+    Resending with the same batch_id is acknowledged without storing the records twice.
+    """
+    return call_mcp_tool(session, "log_messages", {"records": records, "batch_id": batch_id})
+
+# Flush the client-side buffer once it holds this many records or its oldest record is this old
+LOG_BUFFER_MAX_RECORDS = 1000
+LOG_BUFFER_MAX_AGE = 2.0 # seconds
+# While the server is unreachable keep at most this many records, dropping the oldest
+LOG_BUFFER_MAX_PENDING = 50000
+# Back off between failed deliveries, doubling up to this limit
+LOG_BUFFER_MAX_RETRY_DELAY = 30.0 # seconds
+
+class LogBuffer:
+    """
+    Collects log records and ships them to the MCP server in batches of at most
+    max_records, one request per batch. A background worker thread flushes when a
+    batch is full or the oldest record is older than max_age and backs off after
+    failed deliveries (or waits out the server's retry_after hint), so adding a
+    record never waits on the network. A failed batch is resent unchanged under the
+    same batch id, so a delivery whose response was lost is not stored twice. At most max_pending records are kept while
+    deliveries fail; the oldest are dropped (and counted) beyond that. status()
+    reports delivery progress.
+    """
+    def __init__(self, session: MCPHttpSession, max_records: int = LOG_BUFFER_MAX_RECORDS,
+                 max_age: float = LOG_BUFFER_MAX_AGE, max_pending: int = LOG_BUFFER_MAX_PENDING):
+        self.session = session
+        self.max_records = max_records
+        self.max_age = max_age
+        self.max_pending = max_pending
+        self.last_result = None
+        self.last_attempt = None
+        self.delivered = 0
+        self.dropped = 0
+        self._lock = threading.Lock()
+        self._records = deque()
+        self._batch = None # (batch_id, records) being delivered, kept until acknowledged
+        self._oldest = None
+        self._retry_delay = 0.0
+        self._retry_at = 0.0
+        self._force = False
+        self._wake = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="log-buffer-flusher", daemon=True)
+        self._thread.start()
+
+    def __len__(self):
+        with self._lock:
+            return len(self._records)
+
+    def add(self, record: dict):
+        with self._lock:
+            if not self._records:
+                self._oldest = time.monotonic()
+            self._records.append(record)
+            self._trim_locked()
+            full = len(self._records) >= self.max_records
+        if full:
+            self._wake.set()
+
+    def _trim_locked(self):
+        while len(self._records) + self._batch_size() > self.max_pending and self._records:
+            self._records.popleft()
+            self.dropped += 1
+
+    def request_flush(self):
+        """
+        Asks the worker to send everything now, skipping any retry backoff.
+        """
+        self._force = True
+        self._wake.set()
+
+    def status(self) -> dict:
+        with self._lock:
+            pending = len(self._records) + self._batch_size()
+        return {
+            "pending": pending,
+            "delivered": self.delivered,
+            "dropped": self.dropped,
+            "last_attempt": self.last_attempt,
+            "last_result": self.last_result,
+            "retry_in": max(0.0, self._retry_at - time.monotonic()) if self._retry_delay else 0.0,
+        }
+
+    def _batch_size(self) -> int:
+        return len(self._batch[1]) if self._batch else 0
+
+    def flush(self):
+        """
+        Sends the pending batch, or the oldest max_records records as a new batch;
+        returns the server's response.
+        """
+        with self._lock:
+            if self._batch is None and self._records:
+                records = [self._records.popleft() for _ in range(min(self.max_records, len(self._records)))]
+                self._batch = (uuid.uuid4().hex, records)
+                if not self._records:
+                    self._oldest = None
+            batch = self._batch
+        if batch is None:
+            return self.last_result
+        batch_id, records = batch
+        result = send_logs_to_mcp_server(self.session, records, batch_id)
+        self.last_attempt = datetime.now().strftime("%H:%M:%S")
+        if "error" in result and "retry_after" in result["error"]:
+            # The server asked us to come back later: wait exactly that long, no backoff growth
+            self._retry_delay = result["error"]["retry_after"]
+            self._retry_at = time.monotonic() + self._retry_delay
+        elif "error" in result:
+            self._retry_delay = min(max(self._retry_delay * 2, 1.0), LOG_BUFFER_MAX_RETRY_DELAY)
+            self._retry_at = time.monotonic() + self._retry_delay
+        else:
+            with self._lock:
+                self._batch = None
+            self.delivered += len(records)
+            self._retry_delay = 0.0
+        self.last_result = result
+        return result
+
+    def _due(self):
+        with self._lock:
+            if not self._records and self._batch is None:
+                return False
+            if self._force:
+                return True
+            if time.monotonic() < self._retry_at:
+                return False
+            if self._batch is not None:
+                return True
+            return len(self._records) >= self.max_records or time.monotonic() - self._oldest >= self.max_age
+
+    def _run(self):
+        while True:
+            self._wake.wait(self.max_age / 4)
+            self._wake.clear()
+            # Drain in max_records batches; a failure leaves the rest for the next retry
+            while self._due():
+                result = self.flush()
+                if result is None or "error" in result:
+                    break
+            self._force = False
+
+@st.cache_resource
+def get_log_buffer():
+    return LogBuffer(get_mcp_session())
+
+log_buffer = get_log_buffer()
 
 
 # --- Other Application Content ---
@@ -64,28 +658,56 @@ level = st.selectbox("Level", ["info", "warning", "error"])
 source = st.text_input("Source", value="agent")
 
 if st.button("Add Log"):
-    # Send log to MCP server
-    send_log_to_mcp_server(message, level, source)
+    now = datetime.now()
+    # Queue the log for the MCP server; the buffer sends it with the next batch
+    log_buffer.add({
+        "message": f"From Streamlit ({source}): {message}",
+        "level": level,
+        "source": source,
+        "timestamp": now.strftime("%Y-%m-%d %H:%M:%S")
+    })
     
     # Add to Streamlit's local logs for display
     entry = {
         "message": message,
         "level": level,
         "source": source,
-        "timestamp": datetime.now().strftime("%H:%M:%S")
+        "timestamp": now.strftime("%H:%M:%S")
     }
     st.session_state.logs.append(entry)
+    st.session_state.rendered_logs.append(render_log_entry(entry))
     st.success("Log added to Streamlit display!")
 
+@st.fragment(run_every=2)
+def show_delivery_status():
+    status = log_buffer.status()
+    dropped = f", {status['dropped']} dropped while the server was unreachable" if status["dropped"] else ""
+    st.caption(f"{status['pending']} log(s) waiting to be sent, {status['delivered']} delivered to the MCP server{dropped}")
+    result = status["last_result"]
+    if result is None:
+        return
+    if "error" in result:
+        st.error(f"[{status['last_attempt']}] MCP Server error: {result['error'].get('message', result['error'])} "
+                 f"(retrying in {status['retry_in']:.0f}s)")
+    else:
+        structured = result.get("result", {}).get("structuredContent", {})
+        st.success(f"[{status['last_attempt']}] MCP Server response: {structured.get('message', 'OK')}")
+
+show_delivery_status()
+if st.button("Flush Logs Now"):
+    log_buffer.request_flush()
+
 st.header("Results (Markdown)")
 
-if st.session_state.logs:
-    markdown_content = "# System Logs\n\n"
-    for log in st.session_state.logs:
-        emoji = {"info": "ℹ️", "warning": "⚠️", "error": "❌"}
-        markdown_content += f"{emoji.get(log['level'], '📝')} **[{log['timestamp']}]** `{log['source']}`: {log['message']}\n\n"
-    
-    st.markdown(markdown_content)
+if st.session_state.rendered_logs:
+    rendered = st.session_state.rendered_logs
+    page_count = (len(rendered) + LOG_DISPLAY_PAGE_SIZE - 1) // LOG_DISPLAY_PAGE_SIZE
+    page = st.number_input("Page (newest first)", min_value=1, max_value=page_count, value=1) if page_count > 1 else 1
+    start = (page - 1) * LOG_DISPLAY_PAGE_SIZE
+    # Only the visible window is joined, so rerun cost does not grow with the session
+    window = itertools.islice(reversed(rendered), start, start + LOG_DISPLAY_PAGE_SIZE)
+    st.markdown("# System Logs\n\n" + "\n\n".join(window))
+    st.caption(f"Page {page} of {page_count} ({len(rendered)} entries, keeping the latest {LOG_DISPLAY_MAX_ENTRIES})")
 else:
     st.info("No logs yet - add some entries!")
 
@@ -113,32 +735,50 @@ st.markdown(f"```mermaid\n{mermaid_diagram}```", unsafe_allow_html=True)
 
 st.header("Git Status")
 
-# Git Status
-if 'git_status_future' not in st.session_state:
-    st.session_state.git_status_future = st.session_state.executor.submit(run_git_command, ["git", "status"])
+@st.fragment(run_every=GIT_PANEL_REFRESH_SECONDS)
+def git_panel():
+    snapshot = get_git_snapshots().snapshot()
+    if snapshot is None:
+        st.info("Fetching git status...")
+        return
 
-if st.session_state.git_status_future.running():
-    st.info("Fetching git status...")
-    st.spinner("Loading...")
-    st.rerun()
-else:
-    try:
-        git_status_output = st.session_state.git_status_future.result()
-        st.code(git_status_output, language="bash")
-    except Exception as e:
-        st.error(f"Error getting git status: {e}")
+    st.caption(f"Snapshot taken at {snapshot['taken_at']}")
+    if "status_error" in snapshot:
+        st.error(f"Error getting git status: {snapshot['status_error']}")
+    else:
+        st.code(snapshot["status"], language="bash")
+        if snapshot["status_truncated"]:
+            st.warning(f"git status output truncated at {GIT_STATUS_MAX_BYTES // 1024} KB")
 
-# Git Diff
-if 'git_diff_future' not in st.session_state:
-    st.session_state.git_diff_future = st.session_state.executor.submit(run_git_command, ["git", "diff"])
+    if "diff_error" in snapshot:
+        st.error(f"Error getting git diff: {snapshot['diff_error']}")
+        return
 
-if st.session_state.git_diff_future.running():
-    st.info("Fetching git diff...")
-    st.spinner("Loading...")
-    st.rerun()
-else:
-    try:
-        git_diff_output = st.session_state.git_diff_future.result()
-        st.code(git_diff_output, language="diff")
-    except Exception as e:
-        st.error(f"Error getting git diff: {e}")
\ No newline at end of file
+    files = snapshot["diff_files"]
+    st.caption(f"{len(files)} changed file(s), +{sum(f['added'] for f in files)} "
+               f"-{sum(f['deleted'] for f in files)} lines (expand a file to load its diff)")
+    for item in files[:GIT_DIFF_MAX_FILES]:
+        label = f"{item['path']} (binary)" if item["binary"] else f"{item['path']} (+{item['added']} -{item['deleted']})"
+        expander = st.expander(label, key=f"git_diff_{item['path']}", on_change="rerun")
+        with expander:
+            if expander.open:
+                try:
+                    diff = get_git_snapshots().file_diff(snapshot, item["path"])
+                    if diff is None:
+                        st.info("Loading diff...")
+                    else:
+                        diff_text, truncated = diff
+                        st.code(diff_text, language="diff")
+                        if truncated:
+                            st.warning(f"Diff truncated at {GIT_FILE_DIFF_MAX_BYTES // 1024} KB")
+                except PoolBusyError:
+                    st.info("Worker pool is busy, the diff will load shortly")
+                except Exception as e:
+                    st.error(f"Error getting git diff for {item['path']}: {e}")
+    if len(files) > GIT_DIFF_MAX_FILES:
+        st.warning(f"Showing the first {GIT_DIFF_MAX_FILES} of {len(files)} changed files")
+
+git_panel()
+
+with st.expander("Worker Pool"):
+    st.json(get_worker_pool().metrics())
@@ -1,78 +1,284 @@
 import streamlit as st
 import asyncio
+import csv
+import io
 import json
+import threading
+import time
 from fastmcp.client import Client
+from fastmcp.exceptions import ToolError
+
+from result_cache import ResultCache
+from tool_scheduler import retry_after
+
+# Ping idle connections this often so the server session stays warm
+KEEPALIVE_INTERVAL = 30.0 # seconds
+# Default per-call timeout for call_mcp_tools
+TOOL_CALL_TIMEOUT = 30.0 # seconds
+# Results of tools the server marks idempotent with a cache_ttl are memoized process-wide
+CLIENT_CACHE_SIZE = 512
+CLIENT_CACHE_BYTES = 128 * 1024 * 1024 # JSON size of all cached results
+# Calls the server defers with a retry_after hint are retried for at most this long in total
+RETRY_AFTER_MAX_WAIT = 10.0 # seconds
+
+class MCPConnection:
+    """
+    Long-lived MCP client session for one server URL. The fastmcp Client lives on a
+    dedicated event loop thread, so every Streamlit rerun reuses the same HTTP
+    connection and initialized MCP session instead of paying for a new event loop
+    and handshake per click. Broken sessions are reopened on the next call.
+    """
+    def __init__(self, server_url: str):
+        self.server_url = server_url
+        self.cache_ttls = {} # tool name -> seconds, from the server's idempotency hints
+        self._client = None
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, name=f"mcp-{server_url}", daemon=True)
+        self._thread.start()
+        self._connect_lock = asyncio.Lock()
+        asyncio.run_coroutine_threadsafe(self._keepalive(), self._loop)
+
+    def run(self, coro, timeout: float | None = None):
+        """
+        Runs a coroutine on the connection's event loop and waits for its result.
+        """
+        return asyncio.run_coroutine_threadsafe(coro, self._loop).result(timeout)
+
+    async def client(self):
+        """
+        Returns the connected client, opening a new session if needed.
+        """
+        async with self._connect_lock:
+            if self._client is None or not self._client.is_connected():
+                await self._reset()
+                client = Client(self.server_url)
+                await client.__aenter__()
+                self.cache_ttls = self._read_cache_hints(await client.list_tools())
+                self._client = client
+            return self._client
+
+    @staticmethod
+    def _read_cache_hints(tools) -> dict:
+        """
+        Tools opt in to client-side caching by being annotated idempotent and
+        advertising a positive cache_ttl in their metadata.
+        """
+        ttls = {}
+        for tool in tools:
+            ttl = (tool.meta or {}).get("cache_ttl")
+            if tool.annotations and tool.annotations.idempotent_hint and isinstance(ttl, (int, float)) and ttl > 0:
+                ttls[tool.name] = float(ttl)
+        return ttls
+
+    async def _reset(self):
+        client, self._client = self._client, None
+        if client is not None:
+            try:
+                await client.__aexit__(None, None, None)
+            except Exception:
+                pass
+
+    async def call_tool(self, tool_name: str, tool_arguments: dict):
+        """
+        Calls a tool on the shared session, reconnecting once if the transport failed.
+        """
+        for attempt in range(2):
+            client = await self.client()
+            try:
+                return await client.call_tool(tool_name, tool_arguments)
+            except ToolError:
+                raise
+            except Exception:
+                async with self._connect_lock:
+                    if self._client is client:
+                        await self._reset()
+                if attempt:
+                    raise
+
+    async def call_tools(self, calls: list[tuple[str, dict]], timeout: float | None = None) -> list:
+        """
+        Runs several tool calls concurrently over the shared session. Returns one entry
+        per call, in order: the raw result, or the exception that call raised.
+        """
+        await self.client() # open the session once, before fanning out
+
+        async def one(tool_name, tool_arguments):
+            return await asyncio.wait_for(self.call_tool(tool_name, tool_arguments), timeout)
+
+        return await asyncio.gather(*(one(name, args) for name, args in calls), return_exceptions=True)
+
+    async def _keepalive(self):
+        while True:
+            await asyncio.sleep(KEEPALIVE_INTERVAL)
+            client = self._client
+            if client is None:
+                continue
+            try:
+                await client.ping()
+            except Exception:
+                async with self._connect_lock:
+                    if self._client is client:
+                        await self._reset()
+
+@st.cache_resource
+def get_mcp_connection(server_url: str) -> MCPConnection:
+    return MCPConnection(server_url)
+
+@st.cache_resource
+def get_result_cache() -> ResultCache:
+    return ResultCache(max_entries=CLIENT_CACHE_SIZE, ttl=None, max_bytes=CLIENT_CACHE_BYTES)
+
+def cached_result(connection: MCPConnection, tool_name: str, tool_arguments: dict):
+    """
+    Returns (cache key, cached result) for cacheable tools, (None, None) otherwise.
+    """
+    if tool_name not in connection.cache_ttls:
+        return None, None
+    key = ResultCache.make_key(tool_name, {"server_url": connection.server_url, "arguments": tool_arguments})
+    return key, get_result_cache().get(key)
+
+def remember_result(connection: MCPConnection, tool_name: str, key: str | None, result: dict):
+    if key is not None and isinstance(result, dict) and result.get("status") == "success":
+        get_result_cache().put(key, result, ttl=connection.cache_ttls[tool_name])
 
-async def call_mcp_tool(server_url: str, tool_name: str, tool_arguments: dict) -> dict:
+def parse_tool_result(raw_result) -> dict:
     """
-    Connects to the MCP server, calls a specified tool, and returns the result.
+    Extracts the result dict from a CallToolResult.
     """
-    try:
-        async with Client(server_url) as client:
-            raw_result = await client.call_tool(tool_name, tool_arguments)
+    # 1. Prioritize structured_content if it exists and is not empty
+    if hasattr(raw_result, 'structured_content') and raw_result.structured_content:
 
-            
-            # 1. Prioritize structured_content if it exists and is not empty
-            if hasattr(raw_result, 'structured_content') and raw_result.structured_content:
+        return raw_result.structured_content
+    
+    # 2. Handle raw_result.content if it exists
+    elif hasattr(raw_result, 'content') and raw_result.content:
 
-                return raw_result.structured_content
-            
-            # 2. Handle raw_result.content if it exists
-            elif hasattr(raw_result, 'content') and raw_result.content:
+        if isinstance(raw_result.content, str):
+            try:
+                parsed_json = json.loads(raw_result.content)
 
-                if isinstance(raw_result.content, str):
-                    try:
-                        parsed_json = json.loads(raw_result.content)
+                return parsed_json
+            except json.JSONDecodeError as e:
 
-                        return parsed_json
-                    except json.JSONDecodeError as e:
+                return {"status": "error", "message": f"JSON decode error: {e}"}
+        elif isinstance(raw_result.content, list) and len(raw_result.content) > 0:
+            # This is the case where content is a list of TextContent objects
+            first_item = raw_result.content[0]
 
-                        return {"status": "error", "message": f"JSON decode error: {e}"}
-                elif isinstance(raw_result.content, list) and len(raw_result.content) > 0:
-                    # This is the case where content is a list of TextContent objects
-                    first_item = raw_result.content[0]
+            if hasattr(first_item, 'text'):
+                try:
+                    parsed_json = json.loads(first_item.text)
 
-                    if hasattr(first_item, 'text'):
-                        try:
-                            parsed_json = json.loads(first_item.text)
+                    return parsed_json
+                except json.JSONDecodeError as e:
 
-                            return parsed_json
-                        except json.JSONDecodeError as e:
+                    return {"status": "error", "message": f"JSON decode error: {e}"}
+            else:
 
-                            return {"status": "error", "message": f"JSON decode error: {e}"}
-                    else:
+                return {"status": "error", "message": "No text content in result from raw_result.content list"}
+        else:
 
-                        return {"status": "error", "message": "No text content in result from raw_result.content list"}
-                else:
+            return {"status": "error", "message": "Unexpected content format"}
+    
+    # 3. Handle the case where raw_result itself is a list (less common now, but keep for robustness)
+    elif isinstance(raw_result, list) and len(raw_result) > 0:
 
-                    return {"status": "error", "message": "Unexpected content format"}
-            
-            # 3. Handle the case where raw_result itself is a list (less common now, but keep for robustness)
-            elif isinstance(raw_result, list) and len(raw_result) > 0:
+        first_item = raw_result[0]
 
-                first_item = raw_result[0]
+        if hasattr(first_item, 'text'):
+            try:
+                parsed_json = json.loads(first_item.text)
 
-                if hasattr(first_item, 'text'):
-                    try:
-                        parsed_json = json.loads(first_item.text)
+                return parsed_json
+            except json.JSONDecodeError as e:
 
-                        return parsed_json
-                    except json.JSONDecodeError as e:
+                return {"status": "error", "message": f"JSON decode error: {e}"}
+        else:
 
-                        return {"status": "error", "message": f"JSON decode error: {e}"}
-                else:
+            return {"status": "error", "message": "No text content in result from raw_result list"}
+    
+    # 4. If none of the above, return unexpected format
+    else:
 
-                    return {"status": "error", "message": "No text content in result from raw_result list"}
-            
-            # 4. If none of the above, return unexpected format
-            else:
+        return {"status": "error", "message": "Unexpected result format"}
 
-                return {"status": "error", "message": "Unexpected result format"}
-                
+def call_mcp_tool(server_url: str, tool_name: str, tool_arguments: dict) -> dict:
+    """
+    Calls a specified tool over the pooled MCP session for server_url and returns the result.
+    Calls the server rejects with a retry_after hint are retried after that delay, for up to
+    RETRY_AFTER_MAX_WAIT seconds; after that the rejection is returned as is.
+    """
+    try:
+        connection = get_mcp_connection(server_url)
+        connection.run(connection.client()) # opens the session and loads the cache hints
+        key, result = cached_result(connection, tool_name, tool_arguments)
+        if result is not None:
+            return result
+        deadline = time.monotonic() + RETRY_AFTER_MAX_WAIT
+        while True:
+            raw_result = connection.run(connection.call_tool(tool_name, tool_arguments))
+            result = parse_tool_result(raw_result)
+            delay = retry_after(result)
+            if delay is None or time.monotonic() + delay > deadline:
+                break
+            time.sleep(delay)
+        remember_result(connection, tool_name, key, result)
+        return result
     except Exception as e:
 
         return {"status": "error", "message": f"Error calling MCP tool: {e}"}
 
+def call_mcp_tools(server_url: str, calls: list[tuple[str, dict]], timeout: float | None = TOOL_CALL_TIMEOUT) -> list[dict]:
+    """
+    Calls several tools concurrently over the pooled MCP session and returns their
+    results in order. Each call has its own timeout; a failed or timed-out call
+    yields a {"status": "error"} entry without affecting the others. Calls rejected
+    with a retry_after hint are re-sent together after the longest hint, within
+    RETRY_AFTER_MAX_WAIT seconds.
+    """
+    try:
+        connection = get_mcp_connection(server_url)
+        connection.run(connection.client()) # opens the session and loads the cache hints
+    except Exception as e:
+        return [{"status": "error", "message": f"Error calling MCP tools: {e}"} for _ in calls]
+
+    # Serve cacheable calls locally; only the misses go to the server
+    results = [None] * len(calls)
+    keys = [None] * len(calls)
+    misses = []
+    for i, (tool_name, tool_arguments) in enumerate(calls):
+        keys[i], results[i] = cached_result(connection, tool_name, tool_arguments)
+        if results[i] is None:
+            misses.append(i)
+
+    deadline = time.monotonic() + RETRY_AFTER_MAX_WAIT
+    while misses:
+        try:
+            raw_results = connection.run(connection.call_tools([calls[i] for i in misses], timeout))
+        except Exception as e:
+            raw_results = [e] * len(misses)
+
+        deferred = []
+        for i, raw_result in zip(misses, raw_results):
+            tool_name = calls[i][0]
+            if isinstance(raw_result, asyncio.TimeoutError):
+                results[i] = {"status": "error", "message": f"Tool '{tool_name}' timed out after {timeout}s"}
+            elif isinstance(raw_result, BaseException):
+                results[i] = {"status": "error", "message": f"Error calling MCP tool '{tool_name}': {raw_result}"}
+            else:
+                results[i] = parse_tool_result(raw_result)
+                if retry_after(results[i]) is not None:
+                    deferred.append(i)
+                else:
+                    remember_result(connection, tool_name, keys[i], results[i])
+
+        delay = max((retry_after(results[i]) for i in deferred), default=0.0)
+        if not deferred or time.monotonic() + delay > deadline:
+            break
+        time.sleep(delay)
+        misses = deferred
+    return results
+
 def main():
     st.title("Streamlit MCP Client")
     st.write("Interact with an MCP server by calling a tool.")
@@ -91,31 +297,101 @@ def main():
 
         st.info(f"Calling tool '{tool_name}' on {server_url} with arguments: {tool_arguments}...")
         try:
-            result = asyncio.run(call_mcp_tool(server_url, tool_name, tool_arguments))
+            result = call_mcp_tool(server_url, tool_name, tool_arguments)
     
             st.subheader("Tool Result")
 
         except Exception as e:
             st.error(f"An error occurred: {e}")
 
-    if st.button("Get Log Table"):
+    st.subheader("Log Table")
+    with st.expander("Log Filters"):
+        filter_levels = st.multiselect("Levels", ["DEBUG", "INFO", "WARNING", "ERROR"])
+        filter_source = st.text_input("Source", "")
+        filter_contains = st.text_input("Message contains", "")
+        filter_since = st.text_input("Since (YYYY-MM-DD HH:MM:SS)", "")
+        filter_until = st.text_input("Until (YYYY-MM-DD HH:MM:SS)", "")
+        page_size = st.number_input("Rows per page", min_value=10, max_value=5000, value=100, step=10)
+
+    log_query = {
+        "limit": int(page_size),
+        "levels": filter_levels or None,
+        "sources": [filter_source] if filter_source else None,
+        "contains": filter_contains or None,
+        "since": filter_since or None,
+        "until": filter_until or None,
+        "format": "arrow",
+    }
+
+    col_first, col_next = st.columns(2)
+    fetch_cursor = False
+    if col_first.button("Get Log Table"):
+        fetch_cursor = None
+    if col_next.button("Next Page", disabled=st.session_state.get("log_next_cursor") is None):
+        fetch_cursor = st.session_state.log_next_cursor
+
+    if fetch_cursor is not False:
         st.info("Fetching log table from MCP server...")
         try:
-            result = asyncio.run(call_mcp_tool(server_url, "get_logs_table", {}))
+            result = call_mcp_tool(server_url, "get_logs_table", {**log_query, "cursor": fetch_cursor})
 
-            # Debug: Show the raw result
-
-            
-            if isinstance(result, dict) and result.get("status") == "success" and "data" in result:
-                st.subheader("Log Table")
-                import pandas as pd
-                df = pd.DataFrame(result["data"])
-                st.dataframe(df, use_container_width=True)
+            if isinstance(result, dict) and result.get("status") == "success":
+                st.session_state.log_table = logs_result_to_dataframe(result)
+                st.session_state.log_next_cursor = result.get("next_cursor")
+                st.session_state.log_total = result.get("total")
             else:
                 st.error(f"Failed to get log table: {result}")
         except Exception as e:
             st.error(f"An error occurred: {e}")
 
+    if "log_table" in st.session_state:
+        st.caption(f"{len(st.session_state.log_table)} rows shown, {st.session_state.log_total} entries in store")
+        st.dataframe(st.session_state.log_table, use_container_width=True)
+
+    st.subheader("Search Logs")
+    st.caption('Full-text search on the MCP server: "exact phrase", prefix*, AND/OR/NOT, level:error, source:agent. '
+               "Uses the time range from Log Filters.")
+    search_query = st.text_input("Search", "", placeholder='e.g. "connection reset" OR time*')
+    col_order, col_limit = st.columns(2)
+    search_order = col_order.radio("Order", ["rank", "newest"], horizontal=True,
+                                   format_func=lambda o: "Best match" if o == "rank" else "Newest first")
+    search_limit = col_limit.number_input("Top results", min_value=1, max_value=1000, value=50, step=10)
+    if search_query.strip():
+        result = call_mcp_tool(server_url, "search_logs", {
+            "query": search_query, "limit": int(search_limit), "order": search_order,
+            "since": log_query["since"], "until": log_query["until"],
+        })
+        if isinstance(result, dict) and result.get("status") == "success":
+            lag = f", {result['index_lag']} newest entries not indexed yet" if result.get("index_lag") else ""
+            st.caption(f"{result['count']} matches{lag}")
+            st.dataframe(logs_result_to_dataframe(result), use_container_width=True)
+        else:
+            st.error(f"Search failed: {result.get('message', result)}")
+
+    st.subheader("Live Log Tail")
+    if st.toggle("Follow new log entries", help=f"Polls tail_logs every {TAIL_REFRESH_SECONDS}s and appends only new rows"):
+        live_log_tail(server_url)
+    else:
+        st.session_state.pop("log_tail", None)
+
+    st.subheader("Log Level Breakdown")
+    st.caption("Counted on the MCP server from its log index and rendered there in one call; uses the time range from Log Filters.")
+    if st.button("Show Level Breakdown"):
+        try:
+            result = call_mcp_tool(server_url, "generate_level_breakdown_chart", {
+                "since": log_query["since"], "until": log_query["until"], "transport": "typed",
+            })
+            if isinstance(result, dict) and result.get("status") == "success" and has_chart(result):
+                st.plotly_chart(chart_figure(result), use_container_width=True)
+                top = call_mcp_tool(server_url, "get_top_messages", {"limit": 10})
+                if isinstance(top, dict) and top.get("status") == "success" and top.get("messages"):
+                    st.caption("Most frequent messages" + (" (approximate)" if top.get("approximate") else ""))
+                    st.dataframe(top["messages"], use_container_width=True)
+            else:
+                st.error(f"Failed to get level breakdown: {result.get('message', 'Unknown error')}")
+        except Exception as e:
+            st.error(f"An error occurred: {e}")
+
     st.subheader("Generate Pie Chart")
     chart_labels = st.text_input("Chart Labels (comma-separated)", "A,B,C")
     chart_values = st.text_input("Chart Values (comma-separated numbers)", "10,20,30")
@@ -131,19 +407,15 @@ def main():
                 return
 
             st.info("Generating pie chart on MCP server...")
-            tool_arguments = {"labels": labels_list, "values": values_list, "title": chart_title}
-            result = asyncio.run(call_mcp_tool(server_url, "generate_pie_chart", tool_arguments))
+            tool_arguments = {"labels": labels_list, "values": values_list, "title": chart_title, "transport": "typed"}
+            result = call_mcp_tool(server_url, "generate_pie_chart", tool_arguments)
 
             # Debug: Show the raw result
 
             
-            if isinstance(result, dict) and result.get("status") == "success" and "chart_json" in result:
-                import plotly.io as pio
-                
+            if isinstance(result, dict) and result.get("status") == "success" and has_chart(result):
                 st.subheader("Generated Pie Chart")
-                # Use plotly.io.from_json to properly parse the JSON
-                fig = pio.from_json(result["chart_json"])
-                st.plotly_chart(fig, use_container_width=True)
+                st.plotly_chart(chart_figure(result), use_container_width=True)
             else:
                 st.error(f"Failed to generate pie chart: {result.get('message', 'Unknown error')}")
         except ValueError:
@@ -154,7 +426,7 @@ def main():
     st.subheader("Generate Sunburst Chart")
     data_type = st.selectbox(
         "Select Data Type",
-        ["company_structure", "tech_stack", "sales_regions", "project_breakdown"],
+        ["company_structure", "tech_stack", "sales_regions", "project_breakdown", "custom"],
         help="Choose the type of hierarchical data to visualize"
     )
 
@@ -162,25 +434,40 @@ def main():
         "company_structure": "Organizational hierarchy with departments and teams",
         "tech_stack": "Technology stack breakdown by categories",
         "sales_regions": "Sales performance across global regions", 
-        "project_breakdown": "Software project time allocation by activities"
+        "project_breakdown": "Software project time allocation by activities",
+        "custom": "Your own CSV: one row per leaf, path columns from the root down, value last"
     }
 
     st.info(f"📊 {data_descriptions[data_type]}")
 
+    if data_type == "custom":
+        custom_csv = st.text_area("Hierarchy CSV", "region,country,sales\nEurope,UK,1200\nEurope,Germany,800\nAsia,Japan,800")
+        col_depth, col_fraction = st.columns(2)
+        custom_depth = col_depth.number_input("Max depth (0 = all)", min_value=0, value=0)
+        custom_fraction = col_fraction.number_input("Merge wedges smaller than (fraction)", min_value=0.0,
+                                                    max_value=1.0, value=0.0, step=0.01)
+
     if st.button("Generate Sunburst Chart"):
         st.info("Generating sunburst chart on MCP server...")
         try:
-            tool_arguments = {"data_type": data_type}
-            result = asyncio.run(call_mcp_tool(server_url, "generate_sunburst_chart", tool_arguments))
+            tool_arguments = {"data_type": data_type, "transport": "typed"}
+            if data_type == "custom":
+                rows = list(csv.reader(io.StringIO(custom_csv.strip())))
+                header, rows = rows[0], rows[1:]
+                tool_arguments = {
+                    "table": {name: [row[i] for row in rows] for i, name in enumerate(header)},
+                    "path": header[:-1],
+                    "value_column": header[-1],
+                    "title": "Custom Hierarchy",
+                    "max_depth": int(custom_depth) or None,
+                    "min_fraction": float(custom_fraction),
+                    "transport": "typed",
+                }
+            result = call_mcp_tool(server_url, "generate_sunburst_chart", tool_arguments)
             
-            if isinstance(result, dict) and result.get("status") == "success" and "chart_json" in result:
-                import plotly.io as pio
-                
-                st.subheader(f"Generated Sunburst Chart: {result.get('data_type', 'Unknown')}")
-                
-                # Use plotly.io.from_json to properly parse the JSON
-                fig = pio.from_json(result["chart_json"])
-                st.plotly_chart(fig, use_container_width=True)
+            if isinstance(result, dict) and result.get("status") == "success" and has_chart(result):
+                st.subheader(f"Generated Sunburst Chart: {result.get('data_type', 'custom')}")
+                st.plotly_chart(chart_figure(result), use_container_width=True)
                 
                 # Add some helpful information
                 st.markdown("""
@@ -196,6 +483,42 @@ def main():
         except Exception as e:
             st.error(f"An error occurred: {e}")
 
+    with st.expander("Client Result Cache"):
+        st.json(get_result_cache().stats())
+
+    st.subheader("Dashboard")
+    st.caption("Loads the log table, the pie chart and the sunburst chart above in one concurrent batch.")
+    if st.button("Load Whole Dashboard"):
+        try:
+            dashboard_calls = [
+                ("get_logs_table", {**log_query, "cursor": None}),
+                ("generate_pie_chart", {
+                    "labels": [label.strip() for label in chart_labels.split(',')],
+                    "values": [float(value.strip()) for value in chart_values.split(',')],
+                    "title": chart_title,
+                    "transport": "typed",
+                }),
+                ("generate_sunburst_chart", {"data_type": data_type, "transport": "typed"}),
+            ]
+        except ValueError:
+            st.error("Please enter valid numbers for chart values.")
+            return
+
+        logs_result, pie_result, sunburst_result = call_mcp_tools(server_url, dashboard_calls)
+
+        if logs_result.get("status") == "success":
+            st.dataframe(logs_result_to_dataframe(logs_result), use_container_width=True)
+        else:
+            st.error(f"Failed to get log table: {logs_result.get('message', logs_result)}")
+
+        col_pie, col_sunburst = st.columns(2)
+        for column, result, name in ((col_pie, pie_result, "pie chart"), (col_sunburst, sunburst_result, "sunburst chart")):
+            with column:
+                if result.get("status") == "success" and has_chart(result):
+                    st.plotly_chart(chart_figure(result), use_container_width=True)
+                else:
+                    st.error(f"Failed to generate {name}: {result.get('message', 'Unknown error')}")
+
     # Mermaid Diagram Section
     st.subheader("Generate Mermaid Diagram")
     
@@ -240,7 +563,7 @@ def main():
                 "diagram_type": selected_diagram_type,
                 "content": custom_content if use_custom_content else ""
             }
-            result = asyncio.run(call_mcp_tool(server_url, "generate_mermaid_diagram", tool_arguments))
+            result = call_mcp_tool(server_url, "generate_mermaid_diagram", tool_arguments)
             
             # Debug: Show the raw result
             with st.expander("Debug: Raw Result"):
@@ -252,8 +575,13 @@ def main():
                 # Display the Mermaid code
                 st.code(result["mermaid_code"], language="mermaid")
                 
-                # Enhanced Mermaid rendering
-                mermaid_html = render_mermaid_diagram(result["mermaid_code"])
+                # Prefer the server's pre-rendered SVG; fall back to rendering in the browser
+                svg_result = call_mcp_tool(server_url, "render_mermaid_svg", {"mermaid_code": result["mermaid_code"]})
+                if isinstance(svg_result, dict) and svg_result.get("status") == "success":
+                    mermaid_html = render_mermaid_svg_html(svg_result["svg"], result["mermaid_code"])
+                else:
+                    st.caption(f"Server-side rendering unavailable ({svg_result.get('message', 'unknown error')}); rendering in the browser.")
+                    mermaid_html = render_mermaid_diagram(result["mermaid_code"])
                 st.markdown(mermaid_html, unsafe_allow_html=True)
                 
                 # Add helpful information
@@ -278,6 +606,66 @@ def main():
         except Exception as e:
             st.error(f"An error occurred: {e}")
 
+# Live tail refresh period and how many rows the tail view keeps
+TAIL_REFRESH_SECONDS = 2
+TAIL_MAX_ROWS = 1000
+
+@st.fragment(run_every=TAIL_REFRESH_SECONDS)
+def live_log_tail(server_url: str):
+    """
+    Re-runs on its own every TAIL_REFRESH_SECONDS, fetching only records after the
+    last seen cursor and appending them to the rows already on screen. When more than
+    TAIL_MAX_ROWS arrived since the last run, the server skips to the newest ones so the
+    view stays live instead of falling further behind.
+    """
+    import pandas as pd
+
+    tail = st.session_state.setdefault("log_tail", {"cursor": None, "frame": pd.DataFrame()})
+    result = call_mcp_tool(server_url, "tail_logs",
+                           {"cursor": tail["cursor"], "limit": TAIL_MAX_ROWS, "skip_to_newest": True})
+    if isinstance(result, dict) and result.get("status") == "success":
+        if result.get("skipped"):
+            st.caption(f"Skipped {result['skipped']} entries to keep up with new logs")
+        delta = pd.DataFrame(result["columns"])
+        if not delta.empty:
+            tail["frame"] = pd.concat([tail["frame"], delta], ignore_index=True).tail(TAIL_MAX_ROWS)
+        tail["cursor"] = result["next_cursor"]
+    else:
+        st.error(f"Failed to tail logs: {result}")
+
+    st.caption(f"Showing the last {len(tail['frame'])} entries (cursor {tail['cursor']})")
+    st.dataframe(tail["frame"].iloc[::-1], use_container_width=True)
+
+def has_chart(result: dict) -> bool:
+    return "chart_spec" in result or "chart_json" in result
+
+def chart_figure(result: dict):
+    """
+    Returns something st.plotly_chart can render from a chart tool result. Typed-array
+    specs are passed through as-is (validation skips over typed arrays), while JSON
+    strings are parsed with plotly.io.from_json.
+    """
+    if "chart_spec" in result:
+        return result["chart_spec"]
+    import plotly.io as pio
+
+    return pio.from_json(result["chart_json"])
+
+def logs_result_to_dataframe(result: dict):
+    """
+    Builds a DataFrame from a get_logs_table page without going through per-row dicts.
+    """
+    import pandas as pd
+
+    if "arrow" in result:
+        import base64
+        import pyarrow as pa
+
+        return pa.ipc.open_stream(base64.b64decode(result["arrow"])).read_pandas()
+    if "columns" in result:
+        return pd.DataFrame(result["columns"])
+    return pd.DataFrame(result.get("data", []))
+
 def render_mermaid_diagram(mermaid_code: str, diagram_id: str = "mermaid-diagram"):
     """Enhanced Mermaid diagram rendering with proper JavaScript integration."""
     
@@ -323,5 +711,22 @@ def render_mermaid_diagram(mermaid_code: str, diagram_id: str = "mermaid-diagram
     
     return mermaid_html
 
+def render_mermaid_svg_html(svg: str, mermaid_code: str, diagram_id: str = "mermaid-diagram"):
+    """Wraps a server-rendered Mermaid SVG in the same container as render_mermaid_diagram."""
+    
+    import hashlib
+    unique_id = f"{diagram_id}-{hashlib.md5(mermaid_code.encode()).hexdigest()[:8]}"
+    
+    # Drop the XML prolog so the SVG can be inlined
+    if svg.lstrip().startswith("<?xml"):
+        svg = svg[svg.index("?>") + 2:]
+    
+    return f"""
+    <div id="{unique_id}" style="text-align: center; margin: 20px 0; background-color: white;
+         border: 1px solid #e0e0e0; border-radius: 8px; padding: 20px;">
+        {svg}
+    </div>
+    """
+
 if __name__ == "__main__":
     main()
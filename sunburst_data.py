@@ -0,0 +1,186 @@
+import json
+
+import numpy as np
+
+
+class SunburstTree:
+    """
+    A validated hierarchy as parallel NumPy arrays. parent[i] is the index of node i's
+    parent (-1 for roots) and totals[i] is the value of node i's whole subtree, so the
+    tree is always rendered with branchvalues="total".
+    """
+
+    def __init__(self, ids: np.ndarray, labels: np.ndarray, parent: np.ndarray, totals: np.ndarray):
+        self.ids = ids
+        self.labels = labels
+        self.parent = parent
+        self.totals = totals
+        self.depth = _depths(parent)
+
+    def __len__(self):
+        return len(self.ids)
+
+    @classmethod
+    def from_arrays(cls, ids: list[str], parents: list[str | None], values: list[float],
+                    labels: list[str] | None = None, branchvalues: str = "remainder") -> "SunburstTree":
+        """
+        Builds a tree from plotly-style ids/parents/values. Empty or null parents mark
+        roots. branchvalues is "remainder" (a node's value excludes its children) or
+        "total" (a node's value already includes them).
+        """
+        n = len(ids)
+        if len(parents) != n or len(values) != n or (labels is not None and len(labels) != n):
+            raise ValueError("ids, parents, values (and labels) must have the same length")
+        if branchvalues not in ("remainder", "total"):
+            raise ValueError("branchvalues must be 'remainder' or 'total'")
+
+        ids_arr = np.asarray([str(i) for i in ids], dtype=object)
+        values_arr = _as_values(values)
+        order = np.argsort(ids_arr)
+        sorted_ids = ids_arr[order]
+        if n > 1 and (sorted_ids[1:] == sorted_ids[:-1]).any():
+            duplicate = sorted_ids[1:][sorted_ids[1:] == sorted_ids[:-1]][0]
+            raise ValueError(f"Duplicate id {duplicate!r}")
+
+        parents_arr = np.asarray(["" if p is None else str(p) for p in parents], dtype=object)
+        is_root = parents_arr == ""
+        position = np.searchsorted(sorted_ids, parents_arr[~is_root]) if n else np.array([], dtype=int)
+        position = np.minimum(position, max(n - 1, 0))
+        missing = sorted_ids[position] != parents_arr[~is_root]
+        if missing.any():
+            raise ValueError(f"Unknown parent {parents_arr[~is_root][missing][0]!r}")
+        parent = np.full(n, -1, dtype=np.int64)
+        parent[~is_root] = order[position]
+
+        labels_arr = ids_arr if labels is None else np.asarray([str(label) for label in labels], dtype=object)
+        tree = cls(ids_arr, labels_arr, parent, values_arr)
+        if branchvalues == "remainder":
+            tree.totals = tree._subtree_sums(values_arr)
+        else:
+            child_sums = np.bincount(parent[~is_root], weights=values_arr[~is_root], minlength=n)
+            over = child_sums > values_arr * (1 + 1e-9) + 1e-9
+            if over.any():
+                raise ValueError(f"Children of {ids_arr[over][0]!r} sum to more than its total")
+        return tree
+
+    @classmethod
+    def from_table(cls, table: dict[str, list], path: list[str], value_column: str | None = None) -> "SunburstTree":
+        """
+        Builds a tree from a columnar table, one row per leaf: the path columns give the
+        leaf's ancestors from the root down, value_column its value (1 per row if omitted).
+        Rows with the same path are summed.
+        """
+        if not path:
+            raise ValueError("path must name at least one column")
+        for column in list(path) + ([value_column] if value_column else []):
+            if column not in table:
+                raise ValueError(f"Unknown column {column!r}")
+        n_rows = len(table[path[0]])
+        if any(len(table[column]) != n_rows for column in path):
+            raise ValueError("All path columns must have the same length")
+        values = _as_values(table[value_column]) if value_column else np.ones(n_rows)
+        if len(values) != n_rows:
+            raise ValueError("The value column must have the same length as the path columns")
+
+        columns = [np.asarray(["" if v is None else str(v) for v in table[column]], dtype=str) for column in path]
+        if n_rows and any((column == "").any() for column in columns):
+            raise ValueError("Path columns must not contain empty values")
+
+        ids, labels, parent, totals = [], [], [], []
+        row_parent = np.full(n_rows, -1, dtype=np.int64)
+        offset = 0
+        for level in range(len(columns)):
+            prefixes = np.stack(columns[:level + 1], axis=1) if n_rows else np.empty((0, level + 1), dtype=str)
+            unique, first_row, inverse = np.unique(prefixes, axis=0, return_index=True, return_inverse=True)
+            inverse = inverse.reshape(-1)
+            ids.extend(json.dumps(list(prefix)) for prefix in unique.tolist())
+            labels.extend(unique[:, -1].tolist())
+            parent.extend(row_parent[first_row].tolist())
+            totals.extend(np.bincount(inverse, weights=values, minlength=len(unique)).tolist())
+            row_parent = inverse + offset
+            offset += len(unique)
+
+        return cls(np.asarray(ids, dtype=object), np.asarray(labels, dtype=object),
+                   np.asarray(parent, dtype=np.int64), np.asarray(totals, dtype=float))
+
+    def _subtree_sums(self, values: np.ndarray) -> np.ndarray:
+        totals = values.astype(float).copy()
+        for level in range(int(self.depth.max(initial=0)), 0, -1):
+            at_level = self.depth == level
+            np.add.at(totals, self.parent[at_level], totals[at_level])
+        return totals
+
+    def prune(self, max_depth: int | None = None, min_fraction: float = 0.0,
+              max_nodes: int | None = None) -> "SunburstTree":
+        """
+        Level-of-detail pruning. Drops nodes deeper than max_depth (roots are depth 1),
+        then merges subtrees smaller than min_fraction of the whole tree into one "Other"
+        wedge per parent. If that still leaves more than max_nodes wedges, only the
+        max_nodes // 2 largest subtrees are kept and the rest are merged the same way.
+        """
+        keep = np.ones(len(self), dtype=bool)
+        if max_depth is not None:
+            keep &= self.depth < max_depth
+        kept = keep & (self.totals >= min_fraction * self.totals[self.parent == -1].sum())
+        if max_nodes is not None and kept.sum() + len(np.unique(self.parent[keep & ~kept])) > max_nodes:
+            # Largest subtrees first, parents before children on ties, so every kept node's
+            # parent is kept too; half the budget leaves room for one "Other" wedge per parent
+            candidates = np.flatnonzero(kept)
+            ranked = candidates[np.lexsort((self.depth[candidates], -self.totals[candidates]))]
+            kept[:] = False
+            kept[ranked[:max(max_nodes // 2, 1)]] = True
+
+        # The pruned nodes directly under a kept parent (or at the top) become its "Other" wedge;
+        # deeper pruned nodes are already counted in their pruned ancestor's total
+        small = keep & ~kept
+        merged = small & ((self.parent == -1) | kept[np.maximum(self.parent, 0)])
+        other_sum = np.bincount(self.parent[merged] + 1, weights=self.totals[merged], minlength=len(self) + 1)
+        other_count = np.bincount(self.parent[merged] + 1, minlength=len(self) + 1)
+
+        index = np.flatnonzero(kept)
+        remap = np.full(len(self), -1, dtype=np.int64)
+        remap[index] = np.arange(len(index))
+        ids = self.ids[index].tolist()
+        labels = self.labels[index].tolist()
+        parent = np.where(self.parent[index] >= 0, remap[np.maximum(self.parent[index], 0)], -1).tolist()
+        totals = self.totals[index].tolist()
+        for slot in np.flatnonzero(other_count):
+            owner = slot - 1
+            ids.append(f"__other__:{self.ids[owner] if owner >= 0 else ''}")
+            labels.append(f"Other ({other_count[slot]})")
+            parent.append(int(remap[owner]) if owner >= 0 else -1)
+            totals.append(float(other_sum[slot]))
+
+        return SunburstTree(np.asarray(ids, dtype=object), np.asarray(labels, dtype=object),
+                            np.asarray(parent, dtype=np.int64), np.asarray(totals, dtype=float))
+
+    def parent_ids(self) -> list[str]:
+        return np.where(self.parent >= 0, self.ids[np.maximum(self.parent, 0)], "").tolist()
+
+
+def _as_values(values) -> np.ndarray:
+    try:
+        array = np.asarray(values, dtype=float)
+    except (TypeError, ValueError):
+        raise ValueError("values must be numbers")
+    if array.ndim != 1 or not np.isfinite(array).all() or (array < 0).any():
+        raise ValueError("values must be finite, non-negative numbers")
+    return array
+
+
+def _depths(parent: np.ndarray) -> np.ndarray:
+    """
+    Node depths (roots are 0) by pointer jumping: O(n log depth), and raises on cycles.
+    """
+    n = len(parent)
+    depth = (parent >= 0).astype(np.int64)
+    jump = parent.copy()
+    for _ in range(max(n, 1).bit_length() + 1):
+        active = jump >= 0
+        if not active.any():
+            return depth
+        depth[active] += depth[jump[active]]
+        jump[active] = jump[jump[active]]
+    if (jump >= 0).any():
+        raise ValueError("The hierarchy contains a cycle")
+    return depth
@@ -0,0 +1,158 @@
+import os
+import time
+
+import pytest
+
+from log_store import COLD_SUFFIXES, SEGMENT_PREFIX, SEGMENT_SUFFIX, LogStore, LogStoreWriteError
+
+
+def open_store(directory, **kwargs):
+    # Tests drive maintenance by hand; keep the background pass out of the way
+    kwargs.setdefault("maintenance_interval", 3600)
+    return LogStore(str(directory), **kwargs)
+
+
+def fill(store, count, start=0):
+    for i in range(start, start + count):
+        store.append(f"message {i}", "error" if i % 3 == 0 else "info", f"src{i % 2}")
+    assert store.flush(5)
+
+
+def files(directory, suffix):
+    return sorted(name for name in os.listdir(directory) if name.endswith(suffix))
+
+
+@pytest.fixture
+def tiered(tmp_path):
+    """
+    A store of 60 records whose older segments are compacted to cold files while the
+    newest stays hot.
+    """
+    store = open_store(tmp_path, segment_bytes=512, compact_after=0)
+    fill(store, 60)
+    store.maintain(now=time.time() + 1)
+    stats = store.stats()
+    assert stats["cold_segments"] > 0 and stats["hot_segments"] == 1
+    yield store
+    store.close()
+
+
+def test_recovery_truncates_torn_write(tmp_path):
+    store = open_store(tmp_path)
+    fill(store, 3)
+    store.close()
+    (segment,) = files(tmp_path, SEGMENT_SUFFIX)
+    path = tmp_path / segment
+    intact = path.stat().st_size
+    with open(path, "ab") as f:
+        f.write(b'{"seq": 3, "message": "cut sh')
+
+    store = open_store(tmp_path)
+    try:
+        assert len(store) == 3
+        assert path.stat().st_size == intact
+        assert store.append("after crash")["seq"] == 3
+        assert store.flush(5)
+        assert [r["message"] for r in store.get(range(4))] == ["message 0", "message 1", "message 2", "after crash"]
+    finally:
+        store.close()
+
+
+def test_recovery_prefers_cold_file_over_leftover_hot(tmp_path, tiered):
+    expected = tiered.get(range(60))
+    cold = files(tmp_path, COLD_SUFFIXES["gzip"])
+    # The hot files compaction replaced are only deleted on the next maintenance pass,
+    # so closing now leaves both copies behind, as a crash after the swap would
+    tiered.close()
+    leftover = [name[:-len(COLD_SUFFIXES["gzip"])] + SEGMENT_SUFFIX for name in cold]
+    assert all((tmp_path / name).exists() for name in leftover)
+    (tmp_path / (cold[0] + ".tmp")).write_bytes(b"partial")
+
+    store = open_store(tmp_path)
+    try:
+        assert store.stats()["cold_segments"] == len(cold)
+        assert not any((tmp_path / name).exists() for name in leftover)
+        assert not files(tmp_path, ".tmp")
+        assert store.get(range(60)) == expected
+        assert store.append("next")["seq"] == 60
+    finally:
+        store.close()
+
+
+def test_retention_and_compaction_round_trip(tmp_path):
+    store = open_store(tmp_path, segment_bytes=512, compact_after=0, retention_seconds=60)
+    fill(store, 60)
+    now = time.time()
+    store.maintain(now=now + 1)
+    compacted = store.stats()
+    assert compacted["cold_segments"] > 0 and compacted["dropped_records"] == 0
+    assert [r["seq"] for r in store.get(range(60))] == list(range(60))
+
+    store.maintain(now=now + 120)
+    dropped = store.stats()
+    first, end = store.seq_range()
+    assert dropped["cold_segments"] == 0 and dropped["hot_segments"] == 1
+    assert dropped["dropped_records"] == first > 0 and end == 60
+    assert store.retained() == 60 - first
+    assert store.get(range(first)) == []
+    assert store.read_from(0, 5)[0][0]["seq"] == first
+    assert store.counts()["ERROR"] + store.counts()["INFO"] == 60 - first
+    # Retired files are deleted on the pass after the one that retired them
+    store.maintain(now=now + 120)
+    assert not files(tmp_path, COLD_SUFFIXES["gzip"])
+    store.close()
+
+    store = open_store(tmp_path)
+    try:
+        assert store.seq_range() == (first, 60)
+        assert [r["seq"] for r in store.read_from(0, 100)[0]] == list(range(first, 60))
+    finally:
+        store.close()
+
+
+def test_retention_by_record_count(tmp_path):
+    store = open_store(tmp_path, segment_bytes=512, retention_records=25)
+    try:
+        fill(store, 60)
+        store.maintain()
+        first, end = store.seq_range()
+        assert end == 60 and 0 < first and store.retained() <= 25
+        assert store.stats()["dropped_records"] == first
+    finally:
+        store.close()
+
+
+def test_writer_failure_fails_fast(tmp_path):
+    store = open_store(tmp_path)
+    # A directory where the first segment file should go makes the writer's open() fail
+    (tmp_path / f"{SEGMENT_PREFIX}{0:012d}{SEGMENT_SUFFIX}").mkdir()
+    store.append("lost")
+    with pytest.raises(LogStoreWriteError):
+        store.flush(5)
+    with pytest.raises(LogStoreWriteError):
+        store.append("rejected")
+    assert store.stats()["writer_error"]
+    assert len(store) == 1
+    store.close()
+
+
+def test_reads_span_hot_and_cold_segments(tiered):
+    records = tiered.get([0, 59, 30])
+    assert [r["message"] for r in records] == ["message 0", "message 59", "message 30"]
+
+    newest, cursor = tiered.query(limit=50)
+    assert [r["seq"] for r in newest] == list(range(59, 9, -1))
+    older, cursor = tiered.query(cursor=cursor, limit=50)
+    assert [r["seq"] for r in older] == list(range(9, -1, -1)) and cursor is None
+
+    errors, _ = tiered.query(limit=100, levels=["error"], sources=["src0"])
+    assert [r["seq"] for r in errors] == [i for i in range(59, -1, -1) if i % 6 == 0]
+    assert [r["seq"] for r in tiered.query(limit=100, contains="MESSAGE 4")[0]] == [49, 48, 47, 46, 45, 44, 43, 42, 41, 40, 4]
+
+    assert tiered.counts("level") == {"ERROR": 20, "INFO": 40}
+    assert tiered.counts("source") == {"src0": 30, "src1": 30}
+
+    batch, cursor = tiered.read_from(0, 45)
+    assert [r["seq"] for r in batch] == list(range(45)) and cursor == 45
+    batch, cursor = tiered.read_from(cursor, 45, levels=["error"])
+    assert [r["seq"] for r in batch] == [45, 48, 51, 54, 57] and cursor == 60
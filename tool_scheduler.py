@@ -0,0 +1,231 @@
+import asyncio
+import json
+import math
+import time
+from collections import OrderedDict
+
+from fastmcp.server.middleware import Middleware
+from fastmcp.tools import ToolResult
+
+# How many clients' token buckets are kept; the least recently seen are forgotten first
+MAX_TRACKED_CLIENTS = 10000
+
+
+class Lane:
+    """
+    A class of tools sharing a scheduling policy: a token bucket per client (rate calls
+    per second, up to burst at once) and whether the lane is high priority. High-priority
+    calls are admitted ahead of waiting normal calls and may use the reserved slots.
+    """
+    __slots__ = ("name", "rate", "burst", "priority")
+
+    def __init__(self, name: str, rate: float | None = None, burst: float | None = None, priority: bool = False):
+        self.name = name
+        self.rate = rate
+        self.burst = burst if burst is not None else rate
+        self.priority = priority
+
+
+class TokenBucket:
+    __slots__ = ("rate", "burst", "tokens", "updated")
+
+    def __init__(self, rate: float, burst: float):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+
+    def take(self) -> float:
+        """
+        Takes a token; returns 0.0 on success, otherwise the seconds until one is available.
+        """
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= 1.0:
+            self.tokens -= 1.0
+            return 0.0
+        return (1.0 - self.tokens) / self.rate
+
+
+class SchedulerRejection(Exception):
+    """
+    Raised by ToolScheduler.admit when a call is refused; carries a retry-after hint.
+    """
+
+    def __init__(self, code: str, message: str, retry_after: float):
+        super().__init__(message)
+        self.code = code
+        self.retry_after = retry_after
+
+    def to_result(self, tool: str) -> dict:
+        return {"status": "error", "code": self.code, "message": str(self), "tool": tool,
+                "retry_after": round(self.retry_after, 3)}
+
+
+class ToolScheduler:
+    """
+    Admission control for tool calls on the server's event loop:
+
+      - every lane has a per-client token bucket; an empty bucket rejects the call
+        with code "rate_limited"
+      - at most max_concurrent calls run at once, of which reserved_slots are only
+        available to high-priority lanes, and each tool may have its own concurrency limit
+      - a call that finds no free slot waits up to max_wait (high-priority calls go
+        first), then is rejected with code "overloaded"
+
+    Tools that are not assigned a lane (metrics, reports) are never scheduled.
+    """
+
+    def __init__(self, lanes: dict[str, Lane], tool_lanes: dict[str, str], tool_limits: dict[str, int] | None = None,
+                 max_concurrent: int = 64, reserved_slots: int = 8, max_wait: float = 2.0):
+        self.lanes = lanes
+        self.tool_lanes = tool_lanes
+        self.tool_limits = tool_limits or {}
+        self.max_concurrent = max_concurrent
+        self.reserved_slots = reserved_slots
+        self.max_wait = max_wait
+        self._buckets: OrderedDict[tuple[str, str], TokenBucket] = OrderedDict()
+        self._running = 0
+        self._running_by_tool: dict[str, int] = {}
+        self._priority_waiting = 0
+        self._durations: dict[str, float] = {} # tool -> moving average call duration
+        self._counters = {"admitted": 0, "deferred": 0, "rate_limited": 0, "overloaded": 0}
+        self._condition = None
+
+    def lane_of(self, tool: str) -> Lane | None:
+        name = self.tool_lanes.get(tool)
+        return self.lanes[name] if name is not None else None
+
+    def _take_token(self, client: str, lane: Lane) -> float:
+        if lane.rate is None:
+            return 0.0
+        key = (client, lane.name)
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = self._buckets[key] = TokenBucket(lane.rate, lane.burst)
+            while len(self._buckets) > MAX_TRACKED_CLIENTS:
+                self._buckets.popitem(last=False)
+        else:
+            self._buckets.move_to_end(key)
+        return bucket.take()
+
+    def _has_slot(self, tool: str, lane: Lane) -> bool:
+        limit = self.tool_limits.get(tool)
+        if limit is not None and self._running_by_tool.get(tool, 0) >= limit:
+            return False
+        if lane.priority:
+            return self._running < self.max_concurrent
+        return self._priority_waiting == 0 and self._running < self.max_concurrent - self.reserved_slots
+
+    async def admit(self, tool: str, client: str):
+        """
+        Takes a rate token and a concurrency slot for the call, waiting up to max_wait
+        for the slot. Raises SchedulerRejection if either is unavailable.
+        """
+        lane = self.lane_of(tool)
+        if self._condition is None:
+            self._condition = asyncio.Condition()
+
+        wait = self._take_token(client, lane)
+        if wait:
+            self._counters["rate_limited"] += 1
+            raise SchedulerRejection("rate_limited", f"Rate limit for '{lane.name}' tools exceeded", wait)
+
+        async with self._condition:
+            if not self._has_slot(tool, lane):
+                self._counters["deferred"] += 1
+                self._priority_waiting += lane.priority
+                try:
+                    await asyncio.wait_for(self._condition.wait_for(lambda: self._has_slot(tool, lane)), self.max_wait)
+                except asyncio.TimeoutError:
+                    self._counters["overloaded"] += 1
+                    raise SchedulerRejection("overloaded", f"Server is busy with '{lane.name}' calls",
+                                             max(self._durations.get(tool, 0.0), 0.5)) from None
+                finally:
+                    self._priority_waiting -= lane.priority
+                    # A priority waiter leaving may unblock normal calls
+                    self._condition.notify_all()
+            self._running += 1
+            self._running_by_tool[tool] = self._running_by_tool.get(tool, 0) + 1
+            self._counters["admitted"] += 1
+
+    async def release(self, tool: str, duration: float):
+        async with self._condition:
+            self._running -= 1
+            self._running_by_tool[tool] -= 1
+            average = self._durations.get(tool)
+            self._durations[tool] = duration if average is None else 0.8 * average + 0.2 * duration
+            self._condition.notify_all()
+
+    def stats(self) -> dict:
+        return {
+            **self._counters,
+            "running": self._running,
+            "running_by_tool": {tool: n for tool, n in sorted(self._running_by_tool.items()) if n},
+            "priority_waiting": self._priority_waiting,
+            "max_concurrent": self.max_concurrent,
+            "reserved_slots": self.reserved_slots,
+            "tracked_clients": len({client for client, _ in self._buckets}),
+        }
+
+
+def client_key() -> str:
+    """
+    Identifies the caller for rate limiting: the client_id of its authenticated access
+    token, else its remote address. Calls outside HTTP share one key. Neither a
+    client_id the client reports about itself nor its MCP session is used, since a
+    client can mint either at will to reset its buckets and push other clients' out
+    of the LRU.
+    """
+    from fastmcp.server.dependencies import get_access_token, get_http_request
+
+    token = get_access_token()
+    if token is not None and token.client_id:
+        return f"client:{token.client_id}"
+    try:
+        request = get_http_request()
+    except RuntimeError:
+        return "local"
+    return f"addr:{request.client.host if request.client else 'unknown'}"
+
+
+class SchedulerMiddleware(Middleware):
+    """
+    Runs every tool call through a ToolScheduler. Refused calls get a regular
+    {"status": "error", "code", "retry_after"} result instead of running. Calls that
+    is_cached(tool, arguments) says will be answered from a result cache are cheap, so
+    they are neither charged a token nor given a slot.
+    """
+
+    def __init__(self, scheduler: ToolScheduler, is_cached=None):
+        self.scheduler = scheduler
+        self.is_cached = is_cached
+
+    async def on_call_tool(self, context, call_next):
+        tool = context.message.name
+        if self.scheduler.lane_of(tool) is None:
+            return await call_next(context)
+        if self.is_cached is not None and self.is_cached(tool, context.message.arguments or {}):
+            return await call_next(context)
+        try:
+            await self.scheduler.admit(tool, client_key())
+        except SchedulerRejection as e:
+            payload = e.to_result(tool)
+            return ToolResult(content=json.dumps(payload), structured_content=payload)
+        started = time.perf_counter()
+        try:
+            return await call_next(context)
+        finally:
+            await self.scheduler.release(tool, time.perf_counter() - started)
+
+
+def retry_after(result) -> float | None:
+    """
+    The retry-after hint (seconds) of a scheduler rejection result, or None.
+    """
+    if isinstance(result, dict) and result.get("status") == "error":
+        value = result.get("retry_after")
+        if isinstance(value, (int, float)) and math.isfinite(value):
+            return float(value)
+    return None